@@ -1,24 +1,83 @@
-from .ci import (
-    boot_ci,
-    cod_ci,
-    prb_ci,
-    prd_ci,
-)
-from .load_data import (
-    ccao_sample,
-    quintos_sample,
-)
-from .metrics import (
-    cod,
-    cod_met,
-    ki,
-    med_ratio_met,
-    mki,
-    mki_met,
-    prb,
-    prb_met,
-    prd,
-    prd_met,
-)
-from .outliers import is_outlier
-from .sales_chasing import is_sales_chased
+import importlib
+from typing import TYPE_CHECKING
+
+# Public functions are imported lazily on first access (PEP 562), so that
+# ``import assesspy`` stays cheap and heavy dependencies like statsmodels
+# are only loaded by the functions that need them. Maps each public name to
+# the submodule that defines it
+_LAZY_IMPORTS: dict[str, str] = {
+    "boot_ci": "ci",
+    "cod_ci": "ci",
+    "median_ratio_ci": "ci",
+    "prb_ci": "ci",
+    "prd_ci": "ci",
+    "influence": "jackknife",
+    "jackknife_ci": "jackknife",
+    "ccao_sample": "load_data",
+    "quintos_sample": "load_data",
+    "cod": "metrics",
+    "cod_met": "metrics",
+    "ki": "metrics",
+    "med_ratio_met": "metrics",
+    "median_ratio": "metrics",
+    "mki": "metrics",
+    "mki_met": "metrics",
+    "prb": "metrics",
+    "prb_met": "metrics",
+    "prb_model": "metrics",
+    "prd": "metrics",
+    "prd_met": "metrics",
+    "is_outlier": "outliers",
+    "OutlierWarning": "outliers",
+    "is_sales_chased": "sales_chasing",
+    "QuantileSketch": "sketch",
+    "scan_parquet": "scan",
+    "stream_metrics": "streaming",
+    "RatioStudy": "study",
+    "ratio_study": "study",
+}
+
+__all__ = sorted(_LAZY_IMPORTS)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(f".{module_name}", __name__)
+    value = getattr(module, name)
+    # Cache on the package so later lookups skip __getattr__ entirely
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .ci import boot_ci, cod_ci, median_ratio_ci, prb_ci, prd_ci
+    from .jackknife import influence, jackknife_ci
+    from .load_data import ccao_sample, quintos_sample
+    from .metrics import (
+        cod,
+        cod_met,
+        ki,
+        med_ratio_met,
+        median_ratio,
+        mki,
+        mki_met,
+        prb,
+        prb_met,
+        prb_model,
+        prd,
+        prd_met,
+    )
+    from .outliers import OutlierWarning, is_outlier
+    from .sales_chasing import is_sales_chased
+    from .scan import scan_parquet
+    from .sketch import QuantileSketch
+    from .streaming import stream_metrics
+    from .study import RatioStudy, ratio_study
@@ -1,9 +1,690 @@
-from typing import Union
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Optional, Union
 
+import numpy as np
 import pandas as pd
+from scipy.special import bdtr, bdtrik, stdtrit
 
-from .metrics import _calculate_prb, cod, prd
-from .utils import check_inputs
+from .metrics import (
+    _calculate_prb,
+    _grouped_metrics_weighted_batch,
+    _metrics_batch,
+    _metrics_weighted_batch,
+    cod,
+    ki,
+    median_ratio,
+    mki,
+    prb,
+    prd,
+)
+from .study import _grouped_metrics
+from .utils import _group_codes, check_inputs
+
+# Metrics that can be bootstrapped together on shared resamples, by name.
+# Also the order of the rows returned by boot_ci() for ``fun="all"``
+_ALL_METRICS: tuple[str, ...] = (
+    "median_ratio",
+    "cod",
+    "prd",
+    "prb",
+    "mki",
+    "ki",
+)
+_METRIC_NAMES: dict[Callable, str] = {
+    median_ratio: "median_ratio",
+    cod: "cod",
+    prd: "prd",
+    prb: "prb",
+    mki: "mki",
+    ki: "ki",
+}
+
+# Bootstrap methods that draw each replicate as a vector of counts
+_COUNT_METHODS: tuple[str, ...] = ("multinomial", "poisson")
+
+# Target number of resampled elements in each block. Replicates are drawn in
+# blocks of rows to keep the index matrix from growing with nboot * n (a
+# block of float64 values stays within a typical L2 cache), while still
+# evaluating many replicates per vectorized call. Blocks are also the
+# unit of work sent to each worker. Each block has its own random stream, so
+# the block sizes (and not the number of workers) determine the results for
+# a given seed
+_BOOT_BLOCK_SIZE: int = 2**15
+
+# Inputs of the bootstrap in each worker process, set once per worker by
+# _init_boot_worker() so that they are not sent again with every block
+_WORKER_ARGS: dict = {}
+
+
+def _seed_sequence(
+    random_state: Union[int, np.random.SeedSequence, None],
+) -> np.random.SeedSequence:
+    """
+    Helper function to turn ``random_state`` into a ``SeedSequence``. If no
+    seed is given, one is drawn from the global NumPy random state so that
+    ``np.random.seed()`` still makes results reproducible.
+    """
+    if isinstance(random_state, np.random.SeedSequence):
+        return random_state
+    if random_state is None:
+        random_state = int(np.random.randint(0, 2**31 - 1))
+
+    return np.random.SeedSequence(random_state)
+
+
+def _resolve_metrics(fun) -> Optional[tuple[str, ...]]:
+    """
+    Helper function to turn the ``fun`` argument of boot_ci() into a tuple
+    of metric names when several metrics are requested, either as ``"all"``
+    or as a list of built-in metric functions or names. Returns ``None`` for
+    a single function.
+    """
+    if isinstance(fun, str):
+        if fun != "all":
+            raise ValueError("'fun' must be a function, a list or 'all'.")
+        return _ALL_METRICS
+    if callable(fun):
+        return None
+
+    metrics = tuple(_METRIC_NAMES.get(f, f) for f in fun)
+    unknown = [f for f in metrics if f not in _ALL_METRICS]
+    if unknown:
+        raise ValueError(
+            f"Unknown metrics {unknown}. Lists of metrics may only contain "
+            f"built-in metrics or their names: {', '.join(_ALL_METRICS)}."
+        )
+    if not metrics:
+        raise ValueError("At least one metric is required.")
+
+    return tuple(dict.fromkeys(metrics))
+
+
+def _batch_fun(
+    fun, weighted: bool = False, row_index: Optional[np.ndarray] = None
+) -> Optional[Callable]:
+    """
+    Row-wise version of ``fun``, either a built-in metric or a tuple of
+    metric names, or ``None`` if there is none. Both evaluate every replicate
+    in a single vectorized call to _metrics_batch(). With ``weighted``, the
+    samples are given as counts of each row, as needed by the count-weighted
+    bootstrap and the Bag of Little Bootstraps, the rows must be sorted by
+    ratio, and ``row_index`` holds their original positions (see
+    _metrics_weighted_batch()).
+    """
+    batch = (
+        partial(_metrics_weighted_batch, row_index=row_index)
+        if weighted
+        else _metrics_batch
+    )
+    if isinstance(fun, tuple):
+        return partial(batch, metrics=fun)
+    name = _METRIC_NAMES.get(fun)
+    if name is None:
+        return None
+
+    return lambda *args: batch(*args, metrics=(name,))[:, 0]
+
+
+def _boot_counts(
+    rng: np.random.Generator, n: int, nrows: int, method: str
+) -> np.ndarray:
+    """
+    Draw ``nrows`` bootstrap replicates of ``n`` rows as counts of the
+    number of times each row is resampled. Multinomial counts are the
+    histogram of ``n`` uniform row indices, taken for all replicates with a
+    single ``np.bincount`` call by offsetting the indices of each replicate.
+    Poisson(1) counts are independent across rows, so the sample size varies
+    between replicates.
+    """
+    if method == "poisson":
+        return rng.poisson(1.0, size=(nrows, n))
+    idx = rng.integers(0, n, size=(nrows, n))
+    idx += n * np.arange(nrows)[:, None]
+
+    return np.bincount(idx.ravel(), minlength=nrows * n).reshape(nrows, n)
+
+
+def _stratified_counts(
+    rng: np.random.Generator,
+    starts: np.ndarray,
+    sizes: np.ndarray,
+    nrows: int,
+) -> np.ndarray:
+    """
+    Draw ``nrows`` stratified bootstrap replicates as counts of the number
+    of times each row is resampled. Rows are sorted by group, and group
+    ``g`` spans ``sizes[g]`` rows from ``starts[g]``. Each row is replaced
+    by a random row of its own group, i.e. ``starts[g] + floor(U * n_g)``
+    for a uniform ``U``, so the indices of all groups are drawn at once and
+    every group keeps its size.
+    """
+    n: int = int(sizes.sum())
+    row_starts = np.repeat(starts, sizes)
+    row_sizes = np.repeat(sizes, sizes)
+    offset = (rng.random((nrows, n)) * row_sizes).astype(np.intp)
+    idx = row_starts + np.minimum(offset, row_sizes - 1)
+    idx += n * np.arange(nrows)[:, None]
+
+    return np.bincount(idx.ravel(), minlength=nrows * n).reshape(nrows, n)
+
+
+def _boot_block(
+    fun,
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    nrows: int,
+    seed: np.random.SeedSequence,
+    method: str = "full",
+    strata: Optional[tuple[np.ndarray, np.ndarray]] = None,
+    row_index: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Calculate ``nrows`` bootstrap replicates of ``fun`` using the random
+    stream given by ``seed``. Draws the resample indices as an integer matrix
+    of shape ``(nrows, n)``, gathers the inputs as 2-D arrays, then evaluates
+    the statistic on each row. Built-in metrics are evaluated on all rows
+    at once, other functions are called per row. For the count methods, the
+    inputs must be sorted by ratio and are never gathered: the built-in
+    metric is evaluated on the counts directly, and ``row_index`` holds the
+    original position of each row, so that ties in sale price keep their
+    input order in the Gini coefficients.
+    Empty Poisson replicates are dropped. If ``fun`` is a tuple of metric
+    names, they are all evaluated on the same replicates, as the columns of
+    a 2-D array.
+
+    If ``strata`` holds the start and size of each group, the inputs must
+    be sorted by group and ratio, and every group is resampled separately
+    (see _stratified_counts()). The metric names in ``fun`` are then
+    evaluated within each group, as an array of shape
+    ``(nrows, ngroups, len(fun))``.
+    """
+    n: int = estimate.size
+    rng = np.random.default_rng(seed)
+
+    if strata is not None:
+        starts, sizes = strata
+        counts = _stratified_counts(rng, starts, sizes, nrows)
+        return _grouped_metrics_weighted_batch(
+            estimate, sale_price, counts, starts, sizes, fun, row_index
+        )
+
+    if method in _COUNT_METHODS:
+        counts = _boot_counts(rng, n, nrows, method)
+        if method == "poisson":
+            counts = counts[counts.any(axis=1)]
+        weighted_fun = _batch_fun(fun, weighted=True, row_index=row_index)
+        return weighted_fun(estimate, sale_price, counts)
+
+    idx = rng.integers(0, n, size=(nrows, n))
+    est_boot, sp_boot = estimate[idx], sale_price[idx]
+
+    batch_fun = _batch_fun(fun)
+    if batch_fun is not None:
+        return batch_fun(est_boot, sp_boot)
+
+    return np.array(
+        [
+            fun(pd.Series(est), pd.Series(sp))
+            for est, sp in zip(est_boot, sp_boot)
+        ],
+        dtype=float,
+    )
+
+
+def _init_boot_worker(
+    fun,
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    method: str,
+    strata: Optional[tuple[np.ndarray, np.ndarray]],
+    row_index: Optional[np.ndarray],
+) -> None:
+    """
+    Process pool initializer used by _boot_replicates(). Stores the inputs
+    shared by every block in the worker, so that they are pickled once per
+    worker rather than once per block.
+    """
+    _WORKER_ARGS.update(
+        fun=fun,
+        estimate=estimate,
+        sale_price=sale_price,
+        method=method,
+        strata=strata,
+        row_index=row_index,
+    )
+
+
+def _worker_boot_block(nrows: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Run _boot_block() in a worker process, on the inputs stored by
+    _init_boot_worker().
+    """
+    return _boot_block(nrows=nrows, seed=seed, **_WORKER_ARGS)
+
+
+def _boot_block_sizes(nboot: int, n: int) -> list[int]:
+    """
+    Split ``nboot`` replicates of ``n`` rows into blocks of about
+    ``_BOOT_BLOCK_SIZE`` elements each (at least one replicate per block).
+    Only depends on ``nboot`` and ``n``, never on the number of workers.
+    """
+    block_rows = max(1, _BOOT_BLOCK_SIZE // n)
+
+    return [
+        min(block_rows, nboot - start) for start in range(0, nboot, block_rows)
+    ]
+
+
+def _boot_replicates(
+    fun,
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    nboot: int,
+    random_state: Union[int, np.random.SeedSequence, None] = None,
+    n_jobs: int = 1,
+    method: str = "full",
+    strata: Optional[tuple[np.ndarray, np.ndarray]] = None,
+    row_index: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Bootstrap engine used by boot_ci(). Splits the ``nboot`` replicates into
+    blocks, gives each block an independent child seed spawned from
+    ``random_state``, then evaluates the blocks either sequentially or across
+    a pool of ``n_jobs`` processes. The inputs are sent to each worker once,
+    through the pool initializer, and each task only carries a block size
+    and a seed. Results only depend on the seed, not on the number of
+    workers.
+    """
+    block_sizes = _boot_block_sizes(nboot, estimate.size)
+    seeds = _seed_sequence(random_state).spawn(len(block_sizes))
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs > 1 and len(block_sizes) > 1:
+        max_workers = min(n_jobs, len(block_sizes))
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_boot_worker,
+            initargs=(fun, estimate, sale_price, method, strata, row_index),
+        ) as executor:
+            blocks = list(
+                executor.map(
+                    _worker_boot_block,
+                    block_sizes,
+                    seeds,
+                    chunksize=-(-len(block_sizes) // (4 * max_workers)),
+                )
+            )
+    else:
+        blocks = [
+            _boot_block(
+                fun,
+                estimate,
+                sale_price,
+                nrows,
+                seed,
+                method,
+                strata,
+                row_index,
+            )
+            for nrows, seed in zip(block_sizes, seeds)
+        ]
+
+    return np.concatenate(blocks)
+
+
+def _mc_std_err(ests: np.ndarray, probs: list[float]) -> np.ndarray:
+    """
+    Monte Carlo standard error of the bootstrap quantiles at ``probs``. The
+    rank of a sample quantile is binomial, so the quantile estimate moves by
+    about the distance between the order statistics one binomial standard
+    deviation below and above it. Half of that distance estimates the
+    standard error without assuming a shape for the replicates.
+    """
+    probs_arr = np.asarray(probs)
+    delta = np.sqrt(probs_arr * (1 - probs_arr) / len(ests))
+    lower = np.quantile(ests, np.clip(probs_arr - delta, 0, 1), axis=0)
+    upper = np.quantile(ests, np.clip(probs_arr + delta, 0, 1), axis=0)
+
+    return (upper - lower) / 2
+
+
+def _boot_bounds(
+    fun,
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    nboot: int,
+    probs: list[float],
+    random_state: Union[int, np.random.SeedSequence, None] = None,
+    n_jobs: int = 1,
+    tol: Optional[float] = None,
+    max_boot: int = 10000,
+    method: str = "full",
+    row_index: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, Optional[int]]:
+    """
+    Bootstrap quantiles at ``probs`` for the full and count-weighted
+    methods, along with the number of replicates used in adaptive mode (or
+    ``None``). For the count-weighted methods, ``row_index`` holds the
+    original position of each row (see _boot_block()). When several metrics are bootstrapped together, each row of
+    the returned quantiles has one value per metric, and adaptive mode
+    stops once every metric is precise enough.
+    """
+    # Take random samples of input, with the same number of rows as input,
+    # with replacement
+    if tol is None:
+        ests = _boot_replicates(
+            fun,
+            estimate,
+            sale_price,
+            nboot,
+            random_state,
+            n_jobs,
+            method,
+            row_index=row_index,
+        )
+        return np.quantile(ests, probs, axis=0), None
+
+    # Adaptive mode: each batch gets its own child seed, so results for a
+    # given random_state do not depend on when the loop stops
+    if tol <= 0:
+        raise ValueError("'tol' must be a positive number.")
+    seed = _seed_sequence(random_state)
+    batches: list[np.ndarray] = []
+    nboot_used = 0
+    while True:
+        batch_size = max(1, min(nboot, max_boot - nboot_used))
+        batches.append(
+            _boot_replicates(
+                fun,
+                estimate,
+                sale_price,
+                batch_size,
+                seed.spawn(1)[0],
+                n_jobs,
+                method,
+                row_index=row_index,
+            )
+        )
+        nboot_used += batch_size
+        ests = np.concatenate(batches)
+        mc_std_err = _mc_std_err(ests, probs)
+        if nboot_used >= max_boot or np.all(
+            mc_std_err <= tol * ests.std(axis=0)
+        ):
+            break
+
+    return np.quantile(ests, probs, axis=0), nboot_used
+
+
+def _blb_subset(
+    fun,
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    row_index: np.ndarray,
+    rng: np.random.Generator,
+    n: int,
+    nboot: int,
+) -> np.ndarray:
+    """
+    Bootstrap replicates of ``fun`` on a single Bag of Little Bootstraps
+    subset, minus the estimate of ``fun`` on the subset itself. The subset
+    must be sorted by ratio, and ``row_index`` holds the original position
+    of each of its rows. Each replicate is a vector of multinomial counts
+    of the subset rows that sum to ``n``, drawn from ``rng``.
+    """
+    weighted_fun = _batch_fun(fun, weighted=True, row_index=row_index)
+    b: int = estimate.size
+    block_rows = max(1, _BOOT_BLOCK_SIZE // b)
+    pvals = np.full(b, 1 / b)
+    ests = np.concatenate(
+        [
+            weighted_fun(
+                estimate,
+                sale_price,
+                rng.multinomial(n, pvals, size=min(block_rows, nboot - start)),
+            )
+            for start in range(0, nboot, block_rows)
+        ]
+    )
+    subset_est = weighted_fun(estimate, sale_price, np.ones((1, b)))[0]
+
+    return ests - subset_est
+
+
+def _blb_bounds(
+    fun,
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    nboot: int,
+    probs: list[float],
+    gamma: float = 0.7,
+    n_subsets: int = 10,
+    random_state: Union[int, np.random.SeedSequence, None] = None,
+    n_jobs: int = 1,
+) -> np.ndarray:
+    """
+    Bag of Little Bootstraps (Kleiner et al., 2014). Draws ``n_subsets``
+    subsets of ``b = n ** gamma`` rows without replacement, and splits the
+    ``nboot`` replicates evenly across them. Within each subset, every
+    replicate is a vector of multinomial counts that sum to ``n``, i.e. a
+    full size resample of the subset. The statistic is then
+    evaluated on the counts directly, so time and memory scale with ``b``
+    rather than ``n``.
+
+    The replicates of each subset are centered on the estimate on that
+    subset, and the quantiles of all centered replicates are added to the
+    full sample estimate. Subset estimates vary (and, for COD, are biased)
+    much more than the width of their bootstrap distributions, and each
+    subset only has ``nboot / n_subsets`` replicates, so averaging the
+    intervals of the subsets would make the bounds noisy and too narrow.
+    Each subset has its own child seed, and subsets are spread across
+    ``n_jobs`` processes, with only the subset rows sent to each.
+    """
+    if _batch_fun(fun, weighted=True) is None:
+        raise ValueError(
+            "The Bag of Little Bootstraps only supports the built-in "
+            "metrics: median_ratio, cod, prd, prb, mki and ki."
+        )
+    n: int = estimate.size
+    b = min(n, max(2, int(np.ceil(n**gamma))))
+    nboot = -(-nboot // n_subsets)
+    point = _batch_fun(fun)(estimate[None, :], sale_price[None, :])[0]
+
+    subsets = []
+    for seed in _seed_sequence(random_state).spawn(n_subsets):
+        # Sort each subset by ratio once, so that weighted medians only
+        # need cumulative counts
+        rng = np.random.default_rng(seed)
+        subset = rng.choice(n, size=b, replace=False)
+        subset = subset[np.argsort(estimate[subset] / sale_price[subset])]
+        subsets.append((estimate[subset], sale_price[subset], subset, rng))
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs > 1 and n_subsets > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(n_jobs, n_subsets)
+        ) as executor:
+            devs = list(
+                executor.map(
+                    partial(_blb_subset, fun, n=n, nboot=nboot),
+                    *zip(*subsets),
+                )
+            )
+    else:
+        devs = [
+            _blb_subset(fun, est, sp, row_index, rng, n, nboot)
+            for est, sp, row_index, rng in subsets
+        ]
+
+    return point + np.quantile(np.concatenate(devs), probs, axis=0)
+
+
+def _group_boot(
+    fun,
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    nboot: int,
+    probs: list[float],
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    """
+    Point estimate of ``fun`` on a single group, followed by the bootstrap
+    quantiles at ``probs``. The replicates of the group are evaluated
+    sequentially, see _grouped_boot_ci().
+    """
+    point = fun(pd.Series(estimate), pd.Series(sale_price))
+    ests = _boot_replicates(fun, estimate, sale_price, nboot, seed)
+
+    return np.concatenate(([point], np.quantile(ests, probs)))
+
+
+def _init_group_worker(
+    fun,
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    starts: np.ndarray,
+    sizes: np.ndarray,
+    nboot: int,
+    probs: list[float],
+) -> None:
+    """
+    Process pool initializer used by _grouped_boot_ci(). Stores the inputs,
+    sorted by group, in the worker, so that each task only carries a group
+    index and a seed.
+    """
+    _WORKER_ARGS.update(
+        fun=fun,
+        estimate=estimate,
+        sale_price=sale_price,
+        starts=starts,
+        sizes=sizes,
+        nboot=nboot,
+        probs=probs,
+    )
+
+
+def _worker_group_boot(g: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Run _group_boot() on group ``g`` in a worker process, on the inputs
+    stored by _init_group_worker().
+    """
+    rows = slice(
+        _WORKER_ARGS["starts"][g],
+        _WORKER_ARGS["starts"][g] + _WORKER_ARGS["sizes"][g],
+    )
+
+    return _group_boot(
+        _WORKER_ARGS["fun"],
+        _WORKER_ARGS["estimate"][rows],
+        _WORKER_ARGS["sale_price"][rows],
+        _WORKER_ARGS["nboot"],
+        _WORKER_ARGS["probs"],
+        seed,
+    )
+
+
+def _grouped_boot_ci(
+    fun,
+    metrics: Optional[tuple[str, ...]],
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    by,
+    nboot: int,
+    probs: list[float],
+    random_state: Union[int, np.random.SeedSequence, None] = None,
+    n_jobs: int = 1,
+) -> pd.DataFrame:
+    """
+    Stratified bootstrap used by boot_ci() when ``by`` is given. For
+    built-in metrics, the data is sorted once by group and ratio, and the
+    replicates of every group are drawn and evaluated together with
+    segment reductions, so run time scales with the number of rows rather
+    than the number of groups. Other functions are bootstrapped one group
+    at a time, each group with its own child seed. With ``n_jobs``, the
+    groups are spread across a single pool of processes, and each group is
+    evaluated sequentially within its worker.
+    """
+    codes, group_keys = _group_codes(by, estimate.size)
+    ngroups = len(group_keys)
+    sizes = np.bincount(codes, minlength=ngroups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    if metrics is not None:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            grouped = _grouped_metrics(codes, estimate, sale_price, ngroups)
+        point = np.column_stack([grouped[name] for name in metrics])
+        order = np.lexsort((estimate / sale_price, codes))
+        ests = _boot_replicates(
+            metrics,
+            estimate[order],
+            sale_price[order],
+            nboot,
+            random_state,
+            n_jobs,
+            strata=(starts, sizes),
+            row_index=order,
+        )
+        bounds = np.quantile(ests, probs, axis=0)
+    else:
+        metrics = (getattr(fun, "__name__", "fun"),)
+        # Stable sort so that rows keep their input order within each group
+        order = np.argsort(codes, kind="stable")
+        estimate, sale_price = estimate[order], sale_price[order]
+        seeds = _seed_sequence(random_state).spawn(ngroups)
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        if n_jobs > 1 and ngroups > 1:
+            max_workers = min(n_jobs, ngroups)
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_group_worker,
+                initargs=(
+                    fun,
+                    estimate,
+                    sale_price,
+                    starts,
+                    sizes,
+                    nboot,
+                    probs,
+                ),
+            ) as executor:
+                results = list(
+                    executor.map(
+                        _worker_group_boot,
+                        range(ngroups),
+                        seeds,
+                        chunksize=-(-ngroups // (4 * max_workers)),
+                    )
+                )
+        else:
+            results = [
+                _group_boot(
+                    fun,
+                    estimate[start : start + size],
+                    sale_price[start : start + size],
+                    nboot,
+                    probs,
+                    seed,
+                )
+                for start, size, seed in zip(starts, sizes, seeds)
+            ]
+        results = np.array(results)
+        point = results[:, :1]
+        bounds = results[:, 1:].T[:, :, None]
+
+    out = group_keys.repeat(len(metrics)).to_frame(index=False)
+    out["n"] = np.repeat(sizes, len(metrics))
+    out["metric"] = np.tile(metrics, ngroups)
+    out["estimate"] = point.ravel()
+    out["ci_lower"] = bounds[0].ravel()
+    out["ci_upper"] = bounds[1].ravel()
+
+    return out
 
 
 def boot_ci(
@@ -12,13 +693,36 @@ def boot_ci(
     sale_price: Union[list[int], list[float], pd.Series],
     nboot: int = 1000,
     alpha: float = 0.05,
-) -> tuple[float, float]:
+    validate: bool = True,
+    random_state: Union[int, np.random.SeedSequence, None] = None,
+    n_jobs: int = 1,
+    dtype: str = "float64",
+    tol: Optional[float] = None,
+    max_boot: int = 10000,
+    method: str = "full",
+    gamma: float = 0.7,
+    n_subsets: int = 10,
+    by=None,
+) -> Union[tuple[float, float], tuple[float, float, int], pd.DataFrame]:
     """
     Calculate the non-parametric bootstrap confidence interval
     for a given set of numeric values and a chosen function.
 
+    All bootstrap resamples are drawn up front as a matrix of row indices.
+    When ``fun`` is one of the built-in metrics (:func:`median_ratio`,
+    :func:`cod`, :func:`prd`, :func:`prb`, :func:`mki` or :func:`ki`), the
+    statistic is computed for every resample in a single vectorized pass.
+
+    Several built-in metrics can be bootstrapped at once by passing a list
+    of them, or ``"all"``. Every metric is then evaluated on the same
+    resamples, and intermediates shared across metrics (the ratios, the
+    median ratio and the sale price order) are computed once per resample.
+
     :param fun:
-        Function to bootstrap. Must return a single float value.
+        Function to bootstrap. Must return a single float value. Can also be
+        a list of built-in metrics, as functions or names (``median_ratio``,
+        ``cod``, ``prd``, ``prb``, ``mki`` or ``ki``), or ``"all"`` for all
+        of them.
     :param estimate:
         A list or ``pd.Series`` of estimated values.
         Must be the same length as ``sale_price``.
@@ -27,21 +731,107 @@ def boot_ci(
         Must be the same length as ``estimate``.
     :param nboot:
         Default 1000. Number of iterations to use to estimate
-        the output statistic confidence interval.
+        the output statistic confidence interval. In adaptive mode (see
+        ``tol``), the number of iterations in each batch. For the ``blb``
+        method, the iterations are split evenly across the subsets.
     :param alpha:
         Default ``0.05``. Float value indicating the significance level of the
         returned confidence interval. ``0.05`` will return the 95% confidence
         interval.
-    :type fun: function
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :param random_state:
+        Default ``None``. Seed for the bootstrap resamples. Replicates are
+        drawn in blocks, each with its own stream spawned from this seed via
+        ``np.random.SeedSequence.spawn``. If ``None``, the seed is drawn from
+        the global NumPy random state.
+    :param n_jobs:
+        Default ``1``. Number of processes used to compute replicates. ``-1``
+        uses all CPU cores. For the ``blb`` method, the subsets are spread
+        across the processes. Results for a given ``random_state`` are
+        identical regardless of ``n_jobs``. When greater than 1, ``fun`` must be
+        picklable (e.g. a module-level function, not a lambda).
+    :param dtype:
+        Default ``float64``. Floating point type used to store the inputs and
+        the resampled arrays, either ``float64`` or ``float32``. ``float32``
+        halves the memory used by each block of resamples, while built-in
+        metrics still accumulate sums in float64. See
+        :ref:`reduced-precision` for error bounds.
+    :param tol:
+        Default ``None``. If given, run replicates in batches of ``nboot``
+        until the Monte Carlo standard error of both interval bounds is at
+        most ``tol`` times the bootstrap standard error of the statistic
+        (e.g. ``0.05``), or until ``max_boot`` replicates have been run. This
+        stops early for stable samples and spends more replicates on noisy
+        ones. The standard error of each bound is estimated from the spread
+        of the order statistics around it.
+    :param max_boot:
+        Default ``10000``. Maximum number of replicates in adaptive mode.
+    :param method:
+        Default ``full``. Either ``full`` for the standard bootstrap, which
+        copies the resampled rows of each replicate, ``multinomial`` or
+        ``poisson`` for the count-weighted bootstrap, or ``blb`` for the
+        `Bag of Little Bootstraps`_. The count-weighted bootstrap draws each
+        replicate as the number of times each sale is resampled, either
+        multinomial counts (same distribution as ``full``) or independent
+        Poisson(1) counts, which suit streaming data since each sale is
+        weighted without knowing ``n``. The inputs are sorted by ratio once,
+        and the statistic is evaluated on the counts, so no resample is
+        ever copied or sorted. Poisson replicates with no sales are
+        dropped. ``blb`` is much faster for very large samples. It draws
+        ``n_subsets`` random subsets of ``n ** gamma`` sales, runs
+        ``nboot / n_subsets`` full size resamples of each subset (as
+        multinomial counts of each sale), centers them on the estimate of
+        each subset, and adds their quantiles to the full sample estimate.
+        It is meant for samples of tens of thousands of sales or more,
+        where resampling every sale is slow. On smaller samples, use
+        ``full``: subsets of a few hundred sales rarely contain the most
+        extreme ratios, so ``blb`` intervals tend to be slightly narrower.
+        All methods other than ``full`` only support the built-in metrics,
+        and ``blb`` is not supported in adaptive mode.
+    :param gamma:
+        Default ``0.7``. Subset size exponent for the ``blb`` method, between
+        0.5 and 1.
+    :param n_subsets:
+        Default ``10``. Number of subsets for the ``blb`` method.
+    :param by:
+        Default ``None``. Group of each sale, as a list, NumPy array or
+        ``pd.Series`` the same length as ``estimate``, or a ``pd.DataFrame``
+        with one column per grouping variable (e.g. township and
+        neighborhood). Matched to the inputs by position. If given, sales
+        are resampled within each group (a stratified bootstrap) and an
+        interval is calculated for every group. For built-in metrics, all
+        groups are resampled and evaluated together in vectorized passes, so
+        run time scales with the number of sales rather than the number of
+        groups. Only supported by the ``full`` method, without ``tol``.
+    :type fun: function, list or str
     :type estimate: Array-like numeric values
     :type sale_price: Array-like numeric values
     :type nboot: int
     :type alpha: float
+    :type validate: bool
+    :type random_state: int or np.random.SeedSequence
+    :type n_jobs: int
+    :type dtype: str
+    :type tol: float
+    :type max_boot: int
+    :type method: str
+    :type gamma: float
+    :type n_subsets: int
+    :type by: Array-like or pd.DataFrame
 
     :return:
         A tuple of floats containing the bootstrapped confidence
-        interval of the input values.
-    :rtype: tuple[float, float]
+        interval of the input values. In adaptive mode, the tuple also
+        contains the number of replicates used. For a list of metrics or
+        ``"all"``, a tidy ``pd.DataFrame`` with one row per metric and the
+        columns ``metric``, ``estimate``, ``ci_lower`` and ``ci_upper``,
+        plus ``nboot`` in adaptive mode. With ``by``, a tidy
+        ``pd.DataFrame`` with one row per group and metric, containing the
+        grouping columns, the number of sales ``n`` and the same columns.
+    :rtype: tuple[float, float], tuple[float, float, int] or pd.DataFrame
 
     :Example:
 
@@ -56,23 +846,125 @@ def boot_ci(
             sale_price = ap.ccao_sample().sale_price,
             nboot = 1000
         )
+
+        # Calculate the confidence intervals of every metric at once:
+        ap.boot_ci(
+            "all",
+            estimate = ap.ccao_sample().estimate,
+            sale_price = ap.ccao_sample().sale_price,
+        )
+
+        # Calculate COD confidence intervals by township:
+        sample = ap.ccao_sample()
+        ap.boot_ci(
+            ap.cod,
+            estimate = sample.estimate,
+            sale_price = sample.sale_price,
+            by = sample.township_name,
+        )
+
+    .. _Bag of Little Bootstraps: https://arxiv.org/abs/1112.5016
     """
     if nboot <= 0:
         raise ValueError("'nboot' must be a positive integer greater than 0.")
-    check_inputs(estimate, sale_price)
-    df = pd.DataFrame({"estimate": estimate, "sale_price": sale_price})
-    n: int = len(df)
+    if method not in ("full", "blb", *_COUNT_METHODS):
+        raise ValueError(
+            "Method must be one of 'full', 'multinomial', 'poisson' or 'blb'."
+        )
+    metrics = _resolve_metrics(fun)
+    estimate, sale_price = check_inputs(
+        estimate, sale_price, validate=validate, dtype=dtype
+    )
+    probs = [alpha / 2, 1 - alpha / 2]
 
-    # Take a random sample of input, with the same number of rows as input,
-    # with replacement
-    ests = pd.Series(index=range(nboot), dtype=float)
-    for i in range(nboot):
-        sample = df.sample(n=n, replace=True).reset_index(drop=True)
-        ests[i] = fun(sample.iloc[:, 0], sample.iloc[:, 1])
+    if by is not None:
+        if method != "full" or tol is not None:
+            raise ValueError(
+                "Grouped confidence intervals only support the full "
+                "bootstrap, without 'tol'."
+            )
+        if metrics is None and fun in _METRIC_NAMES:
+            metrics = (_METRIC_NAMES[fun],)
+        return _grouped_boot_ci(
+            fun,
+            metrics,
+            estimate,
+            sale_price,
+            by,
+            nboot,
+            probs,
+            random_state,
+            n_jobs,
+        )
 
-    ci = (ests.quantile(alpha / 2), ests.quantile(1 - alpha / 2))
+    if metrics is not None:
+        # All metrics are evaluated together on every replicate
+        fun = metrics
+        point = _metrics_batch(estimate[None, :], sale_price[None, :], fun)
+    nboot_used: Optional[int] = None
 
-    return ci
+    if method == "blb":
+        if not (0.5 <= gamma <= 1):
+            raise ValueError("'gamma' must be between 0.5 and 1.")
+        if n_subsets <= 0:
+            raise ValueError("'n_subsets' must be a positive integer.")
+        if tol is not None:
+            raise ValueError("'tol' is only supported by the full bootstrap.")
+        bounds = _blb_bounds(
+            fun,
+            estimate,
+            sale_price,
+            nboot,
+            probs,
+            gamma,
+            n_subsets,
+            random_state,
+            n_jobs,
+        )
+    else:
+        row_index = None
+        if method in _COUNT_METHODS:
+            if _batch_fun(fun) is None:
+                raise ValueError(
+                    f"The {method} bootstrap only supports the built-in "
+                    "metrics: median_ratio, cod, prd, prb, mki and ki."
+                )
+            # Sort once by ratio, so that every replicate can reuse the
+            # order, and keep the original positions for ties in sale price
+            row_index = np.argsort(estimate / sale_price, kind="stable")
+            estimate, sale_price = estimate[row_index], sale_price[row_index]
+        bounds, nboot_used = _boot_bounds(
+            fun,
+            estimate,
+            sale_price,
+            nboot,
+            probs,
+            random_state,
+            n_jobs,
+            tol,
+            max_boot,
+            method,
+            row_index,
+        )
+
+    if metrics is not None:
+        out = pd.DataFrame(
+            {
+                "metric": metrics,
+                "estimate": point[0],
+                "ci_lower": bounds[0],
+                "ci_upper": bounds[1],
+            }
+        )
+        if nboot_used is not None:
+            out["nboot"] = nboot_used
+        return out
+
+    lower, upper = float(bounds[0]), float(bounds[1])
+    if nboot_used is not None:
+        return lower, upper, nboot_used
+
+    return lower, upper
 
 
 def cod_ci(
@@ -80,7 +972,17 @@ def cod_ci(
     sale_price: Union[list[int], list[float], pd.Series],
     nboot: int = 1000,
     alpha: float = 0.05,
-) -> tuple[float, float]:
+    validate: bool = True,
+    random_state: Union[int, np.random.SeedSequence, None] = None,
+    n_jobs: int = 1,
+    dtype: str = "float64",
+    tol: Optional[float] = None,
+    max_boot: int = 10000,
+    method: str = "full",
+    gamma: float = 0.7,
+    n_subsets: int = 10,
+    by=None,
+) -> Union[tuple[float, float], tuple[float, float, int], pd.DataFrame]:
     """
     Calculate the non-parametric bootstrap confidence interval for COD.
 
@@ -88,7 +990,21 @@ def cod_ci(
         :func:`boot_ci`
     """
     return boot_ci(
-        cod, estimate=estimate, sale_price=sale_price, nboot=nboot, alpha=alpha
+        cod,
+        estimate=estimate,
+        sale_price=sale_price,
+        nboot=nboot,
+        alpha=alpha,
+        validate=validate,
+        random_state=random_state,
+        n_jobs=n_jobs,
+        dtype=dtype,
+        tol=tol,
+        max_boot=max_boot,
+        method=method,
+        gamma=gamma,
+        n_subsets=n_subsets,
+        by=by,
     )
 
 
@@ -97,7 +1013,17 @@ def prd_ci(
     sale_price: Union[list[int], list[float], pd.Series],
     nboot: int = 1000,
     alpha: float = 0.05,
-) -> tuple[float, float]:
+    validate: bool = True,
+    random_state: Union[int, np.random.SeedSequence, None] = None,
+    n_jobs: int = 1,
+    dtype: str = "float64",
+    tol: Optional[float] = None,
+    max_boot: int = 10000,
+    method: str = "full",
+    gamma: float = 0.7,
+    n_subsets: int = 10,
+    by=None,
+) -> Union[tuple[float, float], tuple[float, float, int], pd.DataFrame]:
     """
     Calculate the non-parametric bootstrap confidence interval for PRD.
 
@@ -105,7 +1031,21 @@ def prd_ci(
         :func:`boot_ci`
     """
     return boot_ci(
-        prd, estimate=estimate, sale_price=sale_price, nboot=nboot, alpha=alpha
+        prd,
+        estimate=estimate,
+        sale_price=sale_price,
+        nboot=nboot,
+        alpha=alpha,
+        validate=validate,
+        random_state=random_state,
+        n_jobs=n_jobs,
+        dtype=dtype,
+        tol=tol,
+        max_boot=max_boot,
+        method=method,
+        gamma=gamma,
+        n_subsets=n_subsets,
+        by=by,
     )
 
 
@@ -114,16 +1054,114 @@ def prb_ci(
     sale_price: Union[list[int], list[float], pd.Series],
     nboot: int = 1000,
     alpha: float = 0.05,
+    validate: bool = True,
+    dtype: str = "float64",
 ) -> tuple[float, float]:
     """
-    Calculate the closed-form confidence interval for PRB. Unlike COD and PRB,
-    this does not use bootstrapping.
+    Calculate the closed-form confidence interval for PRB. Unlike COD and PRD,
+    this does not use bootstrapping. The interval is the t-based confidence
+    interval of the PRB regression slope.
 
     See also:
         :func:`boot_ci`
     """
-    prb_model = _calculate_prb(estimate, sale_price)
-    # Select index position 1, since 0 is the confint of the intercept term
-    prb_ci = prb_model.conf_int(alpha=alpha)[1].tolist()
+    prb, std_err, df_resid = _calculate_prb(
+        estimate, sale_price, validate=validate, dtype=dtype
+    )
+    margin = float(stdtrit(df_resid, 1 - alpha / 2)) * std_err
+
+    return prb - margin, prb + margin
+
+
+def median_ratio_ci(
+    estimate: Union[list[int], list[float], pd.Series],
+    sale_price: Union[list[int], list[float], pd.Series],
+    alpha: float = 0.05,
+    validate: bool = True,
+    dtype: str = "float64",
+) -> tuple[float, float]:
+    """
+    Calculate the distribution-free confidence interval for the median
+    ratio. Like :func:`prb_ci`, this does not use bootstrapping, so it is
+    deterministic and much faster.
+
+    The number of ratios below the population median follows a binomial
+    distribution with ``p = 0.5``. The interval runs from the ``j``-th
+    smallest to the ``j``-th largest ratio, where ``j`` is the largest rank
+    whose binomial tail probability is at most ``alpha / 2``, so that its
+    coverage is at least ``1 - alpha``. See `IAAO Standard on Ratio Studies`_
+    Appendix B. Both order statistics are selected with a single
+    ``np.partition`` call.
+
+    .. _IAAO Standard on Ratio Studies: https://www.iaao.org/media/standards/Standard_on_Ratio_Studies.pdf
+
+    .. note::
+        Very small samples (fewer than 6 sales for ``alpha = 0.05``) cannot
+        reach the requested coverage. In that case, a warning is raised and
+        the interval spans all ratios.
+
+    :param estimate:
+        A list or ``pd.Series`` of estimated values.
+        Must be the same length as ``sale_price``.
+    :param sale_price:
+        A list or ``pd.Series`` of sale prices.
+        Must be the same length as ``estimate``.
+    :param alpha:
+        Default ``0.05``. Float value indicating the significance level of the
+        returned confidence interval. ``0.05`` will return the 95% confidence
+        interval.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :param dtype:
+        Default ``float64``. Floating point type used to store the inputs,
+        either ``float64`` or ``float32``. See :ref:`reduced-precision`.
+    :type estimate: Array-like numeric values
+    :type sale_price: Array-like numeric values
+    :type alpha: float
+    :type validate: bool
+    :type dtype: str
+
+    :return:
+        A tuple of floats containing the confidence interval of the median
+        ratio.
+    :rtype: tuple[float, float]
+
+    :Example:
+
+    .. code-block:: python
+
+        # Calculate the median ratio confidence interval:
+        import assesspy as ap
+
+        ap.median_ratio_ci(
+            ap.ccao_sample().estimate, ap.ccao_sample().sale_price
+        )
+    """
+    estimate, sale_price = check_inputs(
+        estimate, sale_price, validate=validate, dtype=dtype
+    )
+    ratio = estimate / sale_price
+    n: int = ratio.size
+
+    # Largest 0-based rank k such that P(X <= k) <= alpha / 2 for
+    # X ~ Binomial(n, 0.5). The inverse CDF gives a starting point, which is
+    # then corrected against the exact CDF
+    k = int(np.floor(bdtrik(alpha / 2, n, 0.5)))
+    while k >= 0 and bdtr(k, n, 0.5) > alpha / 2:
+        k -= 1
+    while bdtr(k + 1, n, 0.5) <= alpha / 2:
+        k += 1
+
+    if k < 0:
+        warnings.warn(
+            f"Sample size (N = {n}) is too small for a {1 - alpha:.0%} "
+            "confidence interval of the median ratio. Returning the range "
+            "of all ratios."
+        )
+        return float(ratio.min()), float(ratio.max())
+
+    ratio_part = np.partition(ratio, [k, n - k - 1])
 
-    return prb_ci[0], prb_ci[1]
+    return float(ratio_part[k]), float(ratio_part[n - k - 1])
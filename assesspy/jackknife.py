@@ -0,0 +1,291 @@
+from typing import Callable, Iterable, Union
+
+import numpy as np
+import pandas as pd
+from scipy.special import stdtrit
+
+from .ci import _ALL_METRICS, _METRIC_NAMES
+from .metrics import _gini_from_sums, _metrics_batch, _prb_design
+from .utils import check_inputs
+
+
+def _check_metrics(metrics) -> tuple[str, ...]:
+    """
+    Helper function to turn the ``metrics`` argument into a tuple of metric
+    names, in the order given. Accepts built-in metric functions or names,
+    a single one or a list, or ``"all"``.
+    """
+    if isinstance(metrics, str) or callable(metrics):
+        metrics = _ALL_METRICS if metrics == "all" else (metrics,)
+    metrics = tuple(dict.fromkeys(_METRIC_NAMES.get(m, m) for m in metrics))
+    unknown = [m for m in metrics if m not in _ALL_METRICS]
+    if unknown or not metrics:
+        raise ValueError(
+            "Metrics must be one or more of the built-in metrics: "
+            f"{', '.join(_ALL_METRICS)}."
+        )
+
+    return metrics
+
+
+def _loo_median(ratio_sorted: np.ndarray, rank: np.ndarray) -> np.ndarray:
+    """
+    Median of the sorted ratios without the value at each position of
+    ``rank``. Dropping one value only shifts the order statistics above it
+    down by one, so each median is read from at most two known positions.
+    """
+    m: int = ratio_sorted.size - 1
+    lower, upper = (m - 1) // 2, m // 2
+
+    return (
+        ratio_sorted[lower + (lower >= rank)]
+        + ratio_sorted[upper + (upper >= rank)]
+    ) / 2
+
+
+def _loo_gini(x_sorted: np.ndarray) -> np.ndarray:
+    """
+    Gini coefficient of ``x_sorted`` (already in sale price order) without
+    each value. Dropping the value at rank ``q`` removes ``q * x[q]`` from
+    the rank-weighted sum and lowers the rank of every later value by one,
+    which removes the sum of the values after it.
+    """
+    n: int = x_sorted.size
+    rank = np.arange(1, n + 1)
+    suffix = np.concatenate((np.cumsum(x_sorted[::-1])[::-1][1:], [0.0]))
+    rank_sum = x_sorted @ rank.astype(float) - rank * x_sorted - suffix
+    x_sum = x_sorted.sum() - x_sorted
+
+    return _gini_from_sums(rank_sum, x_sum, n - 1)
+
+
+def _loo_metrics(
+    estimate: np.ndarray, sale_price: np.ndarray, metrics: tuple[str, ...]
+) -> np.ndarray:
+    """
+    Leave-one-out values of each metric, as an array of shape
+    ``(n, len(metrics))`` where row ``i`` holds the metrics of the sample
+    without sale ``i``. Costs one sort by ratio, one sort by sale price and a
+    few linear passes, instead of ``n`` separate calls to each metric.
+    """
+    n: int = estimate.size
+    m: int = n - 1
+    ratio = estimate / sale_price
+    out: dict[str, np.ndarray] = {}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if {"median_ratio", "cod", "prb"} & set(metrics):
+            order = np.argsort(ratio, kind="stable")
+            ratio_sorted = ratio[order]
+            rank = np.empty(n, dtype=np.intp)
+            rank[order] = np.arange(n)
+            median_ratio = _loo_median(ratio_sorted, rank)
+            out["median_ratio"] = median_ratio
+        if "cod" in metrics:
+            # Sum of absolute deviations of all ratios from each median, from
+            # prefix sums of the sorted ratios, minus the dropped ratio
+            prefix = np.concatenate(([0.0], np.cumsum(ratio_sorted)))
+            below = np.searchsorted(ratio_sorted, median_ratio)
+            abs_diff_sum = (
+                median_ratio * below
+                - prefix[below]
+                + (prefix[-1] - prefix[below])
+                - median_ratio * (n - below)
+                - np.abs(ratio - median_ratio)
+            )
+            out["cod"] = 100 / median_ratio * (abs_diff_sum / m)
+        if "prd" in metrics:
+            weighted_mean = (estimate.sum() - estimate) / (
+                sale_price.sum() - sale_price
+            )
+            out["prd"] = (ratio.sum() - ratio) / m / weighted_mean
+        if "prb" in metrics:
+            # The regression variables depend on the median, which takes at
+            # most three distinct values. For each one, the sums of the
+            # full sample are downdated by the dropped sale
+            prb = np.empty(n)
+            candidates, which = np.unique(median_ratio, return_inverse=True)
+            for j, median in enumerate(candidates):
+                rows = which == j
+                lhs, rhs = _prb_design(estimate, sale_price, median)
+                # Centering does not change the slope, but avoids
+                # cancellation when the sums are downdated
+                lhs, rhs = lhs - lhs.mean(), rhs - rhs.mean()
+                lhs_sum = lhs.sum() - lhs[rows]
+                rhs_sum = rhs.sum() - rhs[rows]
+                cross = lhs @ rhs - lhs[rows] * rhs[rows]
+                rhs_ss = rhs @ rhs - rhs[rows] ** 2
+                prb[rows] = (cross - lhs_sum * rhs_sum / m) / (
+                    rhs_ss - rhs_sum**2 / m
+                )
+            out["prb"] = prb
+        if {"mki", "ki"} & set(metrics):
+            # Stable sort, so that ties keep their input order as in
+            # _calculate_gini()
+            order = np.argsort(sale_price, kind="stable")
+            gini_assessed = np.empty(n)
+            gini_sale_price = np.empty(n)
+            gini_assessed[order] = _loo_gini(estimate[order])
+            gini_sale_price[order] = _loo_gini(sale_price[order])
+            out["mki"] = gini_assessed / gini_sale_price
+            out["ki"] = gini_assessed - gini_sale_price
+
+    return np.column_stack([out[name] for name in metrics])
+
+
+def influence(
+    estimate: Union[list[int], list[float], pd.Series],
+    sale_price: Union[list[int], list[float], pd.Series],
+    metrics: Union[str, Callable, Iterable] = "all",
+    validate: bool = True,
+) -> pd.DataFrame:
+    """
+    Calculate the leave-one-out influence of each sale on ratio statistics,
+    i.e. how much each metric would change if that sale were dropped.
+
+    When a sample fails IAAO standards, the sales with the largest influence
+    are the ones driving the result. Instead of recalculating every metric
+    ``n`` times, all leave-one-out values are derived from the full sample in
+    ``O(n log n)`` total time. Dropping one sale moves the median by at most
+    one order statistic, the PRB regression sums change by a single term,
+    and the Gini rank-weighted sums shift by a suffix sum.
+
+    :param estimate:
+        A list or ``pd.Series`` of estimated values.
+        Must be the same length as ``sale_price``.
+    :param sale_price:
+        A list or ``pd.Series`` of sale prices.
+        Must be the same length as ``estimate``.
+    :param metrics:
+        Default ``all``. Metric or list of metrics to calculate, as built-in
+        metric functions or their names: ``median_ratio``, ``cod``, ``prd``,
+        ``prb``, ``mki`` or ``ki``.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :type estimate: Array-like numeric values
+    :type sale_price: Array-like numeric values
+    :type metrics: str, function or list
+    :type validate: bool
+
+    :return:
+        A ``pd.DataFrame`` with one row per sale, in input order (and with
+        the index of ``estimate`` if it is a ``pd.Series``), and one column
+        per metric. Each value is the metric without that sale minus the
+        metric of the full sample.
+    :rtype: pd.DataFrame
+
+    :Example:
+
+    .. code-block:: python
+
+        # Find the sales that raise COD the most:
+        import assesspy as ap
+
+        sample = ap.ccao_sample()
+        infl = ap.influence(sample.estimate, sample.sale_price, "cod")
+        sample.loc[infl["cod"].nsmallest(10).index]
+    """
+    metrics = _check_metrics(metrics)
+    index = estimate.index if isinstance(estimate, pd.Series) else None
+    estimate, sale_price = check_inputs(
+        estimate, sale_price, validate=validate
+    )
+
+    loo = _loo_metrics(estimate, sale_price, metrics)
+    full = _metrics_batch(estimate[None, :], sale_price[None, :], metrics)
+
+    return pd.DataFrame(loo - full, index=index, columns=list(metrics))
+
+
+def jackknife_ci(
+    fun: Union[str, Callable, Iterable],
+    estimate: Union[list[int], list[float], pd.Series],
+    sale_price: Union[list[int], list[float], pd.Series],
+    alpha: float = 0.05,
+    validate: bool = True,
+) -> Union[tuple[float, float], pd.DataFrame]:
+    """
+    Calculate the jackknife confidence interval of one or more ratio
+    statistics. The leave-one-out values come from the same calculation as
+    :func:`influence`, so this is deterministic and much faster than
+    :func:`boot_ci`.
+
+    The jackknife standard error is
+    ``sqrt((n - 1) / n * sum((t_i - mean(t)) ** 2))``, where ``t_i`` is the
+    metric without sale ``i``. The interval is the metric of the full sample
+    plus or minus the matching t-distribution quantile times the standard
+    error.
+
+    .. note::
+        The jackknife is unreliable for the median ratio, since leave-one-out
+        medians take at most three distinct values. Use
+        :func:`median_ratio_ci` instead.
+
+    :param fun:
+        Built-in metric to calculate the interval of, as a function or its
+        name (``median_ratio``, ``cod``, ``prd``, ``prb``, ``mki`` or
+        ``ki``). Can also be a list of metrics, or ``"all"``.
+    :param estimate:
+        A list or ``pd.Series`` of estimated values.
+        Must be the same length as ``sale_price``.
+    :param sale_price:
+        A list or ``pd.Series`` of sale prices.
+        Must be the same length as ``estimate``.
+    :param alpha:
+        Default ``0.05``. Float value indicating the significance level of the
+        returned confidence interval. ``0.05`` will return the 95% confidence
+        interval.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :type fun: function, str or list
+    :type estimate: Array-like numeric values
+    :type sale_price: Array-like numeric values
+    :type alpha: float
+    :type validate: bool
+
+    :return:
+        For a single metric, a tuple of floats containing the
+        confidence interval. Otherwise, a tidy ``pd.DataFrame`` with one row
+        per metric and the columns ``metric``, ``estimate``, ``std_err``,
+        ``ci_lower`` and ``ci_upper``.
+    :rtype: tuple[float, float] or pd.DataFrame
+
+    :Example:
+
+    .. code-block:: python
+
+        # Calculate COD jackknife confidence interval:
+        import assesspy as ap
+
+        ap.jackknife_ci(
+            ap.cod, ap.ccao_sample().estimate, ap.ccao_sample().sale_price
+        )
+    """
+    single = callable(fun) or (isinstance(fun, str) and fun != "all")
+    metrics = _check_metrics(fun)
+    estimate, sale_price = check_inputs(
+        estimate, sale_price, validate=validate
+    )
+    n: int = estimate.size
+
+    loo = _loo_metrics(estimate, sale_price, metrics)
+    full = _metrics_batch(estimate[None, :], sale_price[None, :], metrics)[0]
+    std_err = np.sqrt((n - 1) / n * ((loo - loo.mean(axis=0)) ** 2).sum(0))
+    margin = float(stdtrit(n - 1, 1 - alpha / 2)) * std_err
+
+    if single:
+        return float(full[0] - margin[0]), float(full[0] + margin[0])
+
+    return pd.DataFrame(
+        {
+            "metric": metrics,
+            "estimate": full,
+            "std_err": std_err,
+            "ci_lower": full - margin,
+            "ci_upper": full + margin,
+        }
+    )
@@ -1,15 +1,108 @@
-import math
-from typing import Union
+from typing import TYPE_CHECKING, Callable, Optional, Union
 
+import numpy as np
 import pandas as pd
-import statsmodels.api as sm
 
 from .utils import check_inputs
 
+if TYPE_CHECKING:
+    from statsmodels.regression.linear_model import RegressionResultsWrapper
+
+# Number of elements cast to float64 at a time when accumulating rank
+# weighted sums of float32 arrays
+_ACC_BLOCK_SIZE: int = 2**16
+
+
+def _dot(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Dot product of two 1-D arrays, accumulated in float64. float32 arrays
+    are cast in small buffered blocks by ``np.einsum``, so no float64 copy
+    of the inputs is made.
+    """
+    if a.dtype == np.float64 and b.dtype == np.float64:
+        return float(a @ b)
+
+    return float(np.einsum("i,i->", a, b, dtype=np.float64))
+
+
+def _rank_dot(x: np.ndarray) -> Union[float, np.ndarray]:
+    """
+    Rank-weighted sum of ``x`` along its last axis, i.e. the sum of
+    ``i * x[..., i - 1]`` for ``i`` from 1 to ``n``, accumulated in float64.
+    Ranks above 2**24 cannot be represented exactly in float32, so for
+    float32 input the ranks are generated in float64 one block at a time.
+    """
+    n: int = x.shape[-1]
+    if x.dtype == np.float64:
+        return x @ np.arange(1, n + 1, dtype=float)
+
+    out = np.zeros(x.shape[:-1])
+    for start in range(0, n, _ACC_BLOCK_SIZE):
+        block = x[..., start : start + _ACC_BLOCK_SIZE]
+        rank = np.arange(start + 1, start + block.shape[-1] + 1, dtype=float)
+        out += np.einsum("...i,i->...", block, rank, dtype=np.float64)
+
+    return out
+
+
+def median_ratio(
+    estimate: Union[list[int], list[float], pd.Series],
+    sale_price: Union[list[int], list[float], pd.Series],
+    validate: bool = True,
+    dtype: str = "float64",
+) -> float:
+    """
+    The median ratio is the middle sales ratio (estimate / sale price) of a
+    sample. It is the IAAO's preferred measure of the overall level of
+    assessment. See `IAAO Standard on Ratio Studies`_ Section 9.2.7.
+
+    .. _IAAO Standard on Ratio Studies: https://www.iaao.org/media/standards/Standard_on_Ratio_Studies.pdf
+
+    :param estimate:
+        A list or ``pd.Series`` of estimated values.
+        Must be the same length as ``sale_price``.
+    :param sale_price:
+        A list or ``pd.Series`` of sale prices.
+        Must be the same length as ``estimate``.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :param dtype:
+        Default ``float64``. Floating point type used to store the inputs and
+        intermediate arrays, either ``float64`` or ``float32``. See
+        :ref:`reduced-precision` for error bounds.
+    :type estimate: Array-like numeric values
+    :type sale_price: Array-like numeric values
+    :type validate: bool
+    :type dtype: str
+
+    :return: A single float value containing the median ratio of the inputs.
+    :rtype: float
+
+    :Example:
+
+    .. code-block:: python
+
+        # Calculate the median ratio:
+        import assesspy as ap
+
+        ap.median_ratio(
+            ap.ccao_sample().estimate, ap.ccao_sample().sale_price
+        )
+    """
+    estimate, sale_price = check_inputs(
+        estimate, sale_price, validate=validate, dtype=dtype
+    )
+
+    return float(np.median(estimate / sale_price))
+
 
 def cod(
     estimate: Union[list[int], list[float], pd.Series],
     sale_price: Union[list[int], list[float], pd.Series],
+    validate: bool = True,
+    dtype: str = "float64",
 ) -> float:
     """
     COD is the average absolute percent deviation from the median ratio.
@@ -35,8 +128,19 @@ def cod(
     :param sale_price:
         A list or ``pd.Series`` of sale prices.
         Must be the same length as ``estimate``.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :param dtype:
+        Default ``float64``. Floating point type used to store the inputs and
+        intermediate arrays, either ``float64`` or ``float32``. ``float32``
+        halves memory use, while sums are still accumulated in float64. See
+        :ref:`reduced-precision` for error bounds.
     :type estimate: Array-like numeric values
     :type sale_price: Array-like numeric values
+    :type validate: bool
+    :type dtype: str
 
     :return: A single float value containing the COD of the inputs.
     :rtype: float
@@ -50,15 +154,14 @@ def cod(
 
         ap.cod(ap.ccao_sample().estimate, ap.ccao_sample().sale_price)
     """
-    check_inputs(estimate, sale_price)
-    estimate = pd.Series(estimate, dtype=float)
-    sale_price = pd.Series(sale_price, dtype=float)
-    ratio: pd.Series = estimate / sale_price
+    estimate, sale_price = check_inputs(
+        estimate, sale_price, validate=validate, dtype=dtype
+    )
+    ratio: np.ndarray = estimate / sale_price
 
     n: int = ratio.size
-    median_ratio: float = ratio.median()
-    ratio_minus_med: pd.Series = ratio - median_ratio
-    abs_diff_sum: float = ratio_minus_med.abs().sum()
+    median_ratio = float(np.median(ratio))
+    abs_diff_sum = float(np.abs(ratio - median_ratio).sum(dtype=np.float64))
     cod = float(100 / median_ratio * (abs_diff_sum / n))
 
     return cod
@@ -67,6 +170,8 @@ def cod(
 def prd(
     estimate: Union[list[int], list[float], pd.Series],
     sale_price: Union[list[int], list[float], pd.Series],
+    validate: bool = True,
+    dtype: str = "float64",
 ) -> float:
     """
     PRD is the mean ratio divided by the mean ratio weighted by sale
@@ -92,8 +197,19 @@ def prd(
     :param sale_price:
         A list or ``pd.Series`` of sale prices.
         Must be the same length as ``estimate``.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :param dtype:
+        Default ``float64``. Floating point type used to store the inputs and
+        intermediate arrays, either ``float64`` or ``float32``. ``float32``
+        halves memory use, while sums are still accumulated in float64. See
+        :ref:`reduced-precision` for error bounds.
     :type estimate: Array-like numeric values
     :type sale_price: Array-like numeric values
+    :type validate: bool
+    :type dtype: str
 
     :return: A single float value containing the PRD of the inputs.
     :rtype: float
@@ -107,38 +223,174 @@ def prd(
 
         ap.prd(ap.ccao_sample().estimate, ap.ccao_sample().sale_price)
     """
-    check_inputs(estimate, sale_price)
-    estimate = pd.Series(estimate, dtype=float)
-    sale_price = pd.Series(sale_price, dtype=float)
-    ratio: pd.Series = estimate / sale_price
+    estimate, sale_price = check_inputs(
+        estimate, sale_price, validate=validate, dtype=dtype
+    )
+    ratio: np.ndarray = estimate / sale_price
 
-    prd = float(ratio.mean() / (ratio * sale_price / sale_price.sum()).sum())
+    # The sale price weighted mean ratio reduces to the sum of estimates over
+    # the sum of sale prices
+    weighted_mean = estimate.sum(dtype=np.float64) / sale_price.sum(
+        dtype=np.float64
+    )
+    prd = float(ratio.mean(dtype=np.float64) / weighted_mean)
 
     return prd
 
 
+def _weighted_median_sorted(
+    x_sorted: np.ndarray, counts: np.ndarray
+) -> np.ndarray:
+    """
+    Row-wise median of the samples in which each value of the sorted 1-D
+    array ``x_sorted`` appears ``counts[i, j]`` times. ``counts`` has shape
+    ``(B, b)``. The value at (0-based) rank ``k`` of a sample is the first
+    value whose cumulative count exceeds ``k``.
+    """
+    cum_counts = np.cumsum(counts, axis=1)
+    total = cum_counts[:, -1:]
+    lower = x_sorted[(cum_counts <= (total - 1) // 2).sum(axis=1)]
+    upper = x_sorted[(cum_counts <= total // 2).sum(axis=1)]
+
+    return (lower + upper) / 2
+
+
+def _prb_design(
+    estimate: np.ndarray, sale_price: np.ndarray, median_ratio: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Helper function to build the PRB regression variables: the percentage
+    difference of each ratio from the median (lhs) and the log2 of the
+    average of the estimate and sale price, in sale price terms (rhs).
+    """
+    ratio = estimate / sale_price
+    lhs = (ratio - median_ratio) / median_ratio
+    rhs = np.log2(((estimate / median_ratio) + sale_price) / 2)
+
+    return lhs, rhs
+
+
+def _prb_fit(
+    lhs: np.ndarray,
+    rhs: np.ndarray,
+    mean: Callable[[np.ndarray], np.ndarray],
+    cross: Callable[[np.ndarray, np.ndarray], np.ndarray],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Closed-form least squares slope of ``lhs ~ 1 + rhs``, shared by every
+    PRB implementation. ``mean(x)`` returns the (weighted) mean of ``x``
+    within each sample, broadcastable against ``x``, and ``cross(x, y)``
+    returns the (weighted) sum of ``x * y`` within each sample. Centering
+    before taking the cross products avoids cancellation. Returns the slope
+    and the centered variables.
+    """
+    lhs_dev = lhs - mean(lhs)
+    rhs_dev = rhs - mean(rhs)
+    slope = cross(rhs_dev, lhs_dev) / cross(rhs_dev, rhs_dev)
+
+    return slope, lhs_dev, rhs_dev
+
+
+def _prb_ols(lhs: np.ndarray, rhs: np.ndarray) -> tuple[float, float, int]:
+    """
+    Closed-form least squares fit of ``lhs ~ 1 + rhs``. Returns the slope,
+    its standard error and the residual degrees of freedom, which are all
+    that PRB and its confidence interval need.
+    """
+    n: int = lhs.size
+    slope, lhs_dev, rhs_dev = _prb_fit(
+        lhs, rhs, lambda x: float(x.mean(dtype=np.float64)), _dot
+    )
+    rhs_ss = _dot(rhs_dev, rhs_dev)
+    resid = lhs_dev - slope * rhs_dev
+    df_resid: int = n - 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std_err = float(np.sqrt(_dot(resid, resid) / df_resid / rhs_ss))
+
+    return slope, std_err, df_resid
+
+
 def _calculate_prb(
     estimate: Union[list[int], list[float], pd.Series],
     sale_price: Union[list[int], list[float], pd.Series],
-) -> sm.regression.linear_model.RegressionResultsWrapper:
+    validate: bool = True,
+    dtype: str = "float64",
+) -> tuple[float, float, int]:
     """
     Helper function to calculate PRB, since the same code gets re-used for
-    both prb() and prb_ci().
+    both prb() and prb_ci(). Returns the PRB coefficient, its standard
+    error and the residual degrees of freedom.
+    """
+    estimate, sale_price = check_inputs(
+        estimate, sale_price, validate=validate, dtype=dtype
+    )
+    median_ratio = float(np.median(estimate / sale_price))
+
+    lhs, rhs = _prb_design(estimate, sale_price, median_ratio)
+
+    return _prb_ols(lhs, rhs)
+
+
+def prb_model(
+    estimate: Union[list[int], list[float], pd.Series],
+    sale_price: Union[list[int], list[float], pd.Series],
+    validate: bool = True,
+) -> "RegressionResultsWrapper":
     """
-    check_inputs(estimate, sale_price)
-    estimate = pd.Series(estimate, dtype=float)
-    sale_price = pd.Series(sale_price, dtype=float)
-    ratio: pd.Series = estimate / sale_price
-    median_ratio: float = ratio.median()
+    Fit the full PRB regression with statsmodels, for model diagnostics such
+    as residuals, R-squared and influence measures. The slope of the fitted
+    model is the PRB. prb() and prb_ci() use an equivalent closed-form
+    solution instead and do not need statsmodels.
+
+    Requires the optional ``statsmodels`` dependency, which can be installed
+    with ``pip install assesspy[diagnostics]``.
+
+    :param estimate:
+        A list or ``pd.Series`` of estimated values.
+        Must be the same length as ``sale_price``.
+    :param sale_price:
+        A list or ``pd.Series`` of sale prices.
+        Must be the same length as ``estimate``.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :type estimate: Array-like numeric values
+    :type sale_price: Array-like numeric values
+    :type validate: bool
+
+    :return:
+        The fitted statsmodels OLS results. The second coefficient is the
+        PRB.
+    :rtype: statsmodels.regression.linear_model.RegressionResultsWrapper
+
+    :Example:
 
-    lhs: pd.Series = (ratio - median_ratio) / median_ratio
-    rhs: pd.Series = ((estimate / median_ratio) + sale_price).apply(
-        lambda x: math.log2(x / 2)
+    .. code-block:: python
+
+        # Fit the PRB model and print its diagnostics:
+        import assesspy as ap
+
+        model = ap.prb_model(
+            ap.ccao_sample().estimate, ap.ccao_sample().sale_price
+        )
+        print(model.summary())
+    """
+    try:
+        import statsmodels.api as sm
+    except ImportError as e:
+        raise ImportError(
+            "prb_model() requires statsmodels. Install it with "
+            "'pip install assesspy[diagnostics]'."
+        ) from e
+
+    estimate, sale_price = check_inputs(
+        estimate, sale_price, validate=validate
     )
+    median_ratio = float(np.median(estimate / sale_price))
 
-    prb_model = sm.OLS(
-        endog=lhs.to_numpy(), exog=sm.tools.tools.add_constant(rhs.to_numpy())
-    ).fit(method="qr")
+    lhs, rhs = _prb_design(estimate, sale_price, median_ratio)
+    prb_model = sm.OLS(endog=lhs, exog=sm.add_constant(rhs)).fit(method="qr")
 
     return prb_model
 
@@ -146,6 +398,8 @@ def _calculate_prb(
 def prb(
     estimate: Union[list[int], list[float], pd.Series],
     sale_price: Union[list[int], list[float], pd.Series],
+    validate: bool = True,
+    dtype: str = "float64",
 ) -> float:
     r"""
     PRB is an index of vertical equity that quantifies the
@@ -168,8 +422,19 @@ def prb(
     :param sale_price:
         A list or ``pd.Series`` of sale prices.
         Must be the same length as ``estimate``.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :param dtype:
+        Default ``float64``. Floating point type used to store the inputs and
+        intermediate arrays, either ``float64`` or ``float32``. ``float32``
+        halves memory use, while sums are still accumulated in float64. See
+        :ref:`reduced-precision` for error bounds.
     :type estimate: Array-like numeric values
     :type sale_price: Array-like numeric values
+    :type validate: bool
+    :type dtype: str
 
     :return: A single float value containing the PRB of the inputs.
     :rtype: float
@@ -183,54 +448,307 @@ def prb(
 
         ap.prb(ap.ccao_sample().estimate, ap.ccao_sample().sale_price)
     """
-    prb_model = _calculate_prb(estimate, sale_price)
-    # Select index position 1, since 0 is the intercept term
-    prb = float(prb_model.params[1])
+    prb, _, _ = _calculate_prb(
+        estimate, sale_price, validate=validate, dtype=dtype
+    )
 
     return prb
 
 
+def _gini_from_sums(
+    rank_sum: Union[float, np.ndarray],
+    x_sum: Union[float, np.ndarray],
+    n: Union[int, np.ndarray],
+) -> Union[float, np.ndarray]:
+    """
+    Gini coefficient from the rank-weighted sum of values put in the desired
+    order (e.g. by sale price), the sum of the values and their number.
+    Shared by every Gini implementation, for scalars and arrays alike.
+    """
+    return (2 * rank_sum / x_sum - (n + 1)) / n
+
+
+def _gini_coef(x_sorted: np.ndarray) -> float:
+    """
+    Gini coefficient of a 1-D array that has already been put in the desired
+    order (e.g. by sale price), computed from a rank-weighted sum.
+    """
+    x_sum = float(x_sorted.sum(dtype=np.float64))
+
+    return _gini_from_sums(float(_rank_dot(x_sorted)), x_sum, x_sorted.size)
+
+
 def _calculate_gini(
     estimate: Union[list[int], list[float], pd.Series],
     sale_price: Union[list[int], list[float], pd.Series],
+    validate: bool = True,
+    dtype: str = "float64",
 ) -> tuple[float, float]:
     """
     Helper function to calculate the Gini coefficients of sales and estimated
     values. Note that the estimated value Gini is based on the sale price order.
     """
-    check_inputs(estimate, sale_price)
-
-    estimate = (
-        pd.Series(estimate, dtype=float)
-        .rename("estimate")
-        .reset_index(drop=True)
+    estimate, sale_price = check_inputs(
+        estimate, sale_price, validate=validate, dtype=dtype
     )
-    sale_price = (
-        pd.Series(sale_price, dtype=float)
-        .rename("sale_price")
-        .reset_index(drop=True)
+
+    # Stable sort is required so that ties keep their input order
+    order = np.argsort(sale_price, kind="stable")
+    gini_assessed = _gini_coef(estimate[order])
+    gini_sale_price = _gini_coef(sale_price[order])
+
+    return gini_assessed, gini_sale_price
+
+
+def _gini_batch(
+    estimate: np.ndarray, sale_price: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise version of _calculate_gini() for 2-D arrays of shape ``(B, n)``.
+    Each row is stable sorted by sale price, then both Gini coefficients are
+    computed from rank-weighted sums.
+    """
+    n: int = estimate.shape[1]
+    order = np.argsort(sale_price, axis=1, kind="stable")
+    a_sorted = np.take_along_axis(estimate, order, axis=1)
+    sp_sorted = np.take_along_axis(sale_price, order, axis=1)
+    a_sum = a_sorted.sum(axis=1, dtype=np.float64)
+    sp_sum = sp_sorted.sum(axis=1, dtype=np.float64)
+
+    return (
+        _gini_from_sums(_rank_dot(a_sorted), a_sum, n),
+        _gini_from_sums(_rank_dot(sp_sorted), sp_sum, n),
     )
-    df = pd.concat([estimate, sale_price], axis=1)
-    # Mergesort is required for stable sort results
-    df.sort_values(by="sale_price", kind="mergesort", inplace=True)
-    df.reset_index(drop=True, inplace=True)
-    a_sorted, sp_sorted = df["estimate"], df["sale_price"]
-    n: int = a_sorted.size
 
-    assessed_sum: float = sum(a_sorted[i] * (i + 1) for i in range(n))
-    g_assessed: float = 2 * assessed_sum / a_sorted.sum() - (n + 1)
-    gini_assessed: float = g_assessed / float(n)
 
-    sale_price_sum: float = sum(sp_sorted[i] * (i + 1) for i in range(n))
-    g_sale_price: float = 2 * sale_price_sum / sp_sorted.sum() - (n + 1)
-    gini_sale_price: float = g_sale_price / float(n)
+def _gini_weighted_batch(
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    counts: np.ndarray,
+    row_index: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise version of _calculate_gini() for samples given as the number of
+    times each sale appears in them. The inputs are sorted by sale price
+    once for all rows, with ties broken by ``row_index`` (the position of
+    each sale in the original input, by default its position here), same as
+    the stable sort of _calculate_gini() on the expanded sample in input
+    order. In the expanded sample, the copies of sale ``i`` take the ranks
+    after the ``C[i - 1]`` copies of the sales before it, so their ranks sum
+    to ``c[i] * C[i - 1] + c[i] * (c[i] + 1) / 2``.
+    """
+    if row_index is None:
+        row_index = np.arange(estimate.size)
+    order = np.lexsort((row_index, sale_price))
+    a_sorted, sp_sorted = estimate[order], sale_price[order]
+    counts = counts[:, order].astype(np.float64)
+    cum_counts = np.cumsum(counts, axis=1)
+    n = cum_counts[:, -1]
+    rank_sum = counts * (cum_counts - counts) + counts * (counts + 1) / 2
+
+    return (
+        _gini_from_sums(rank_sum @ a_sorted, counts @ a_sorted, n),
+        _gini_from_sums(rank_sum @ sp_sorted, counts @ sp_sorted, n),
+    )
 
-    return gini_assessed, gini_sale_price
+
+def _metrics_batch(
+    estimate: np.ndarray, sale_price: np.ndarray, metrics: tuple[str, ...]
+) -> np.ndarray:
+    """
+    Row-wise values of several metrics for 2-D arrays of shape ``(B, n)``,
+    as an array of shape ``(B, len(metrics))``. Each name in ``metrics`` is
+    one of ``median_ratio``, ``cod``, ``prd``, ``prb``, ``mki`` or ``ki``.
+    Intermediates shared across metrics (the ratios, the median ratio and
+    the Gini coefficients) are computed once per call, same as RatioStudy.
+    """
+    ratio = estimate / sale_price
+    out: dict[str, np.ndarray] = {}
+
+    if {"median_ratio", "cod", "prb"} & set(metrics):
+        median_ratio = np.median(ratio, axis=1)
+        out["median_ratio"] = median_ratio
+    if "cod" in metrics:
+        abs_diff_mean = np.abs(ratio - median_ratio[:, None]).mean(
+            axis=1, dtype=np.float64
+        )
+        out["cod"] = 100 / median_ratio * abs_diff_mean
+    if "prd" in metrics:
+        weighted_mean = estimate.sum(
+            axis=1, dtype=np.float64
+        ) / sale_price.sum(axis=1, dtype=np.float64)
+        out["prd"] = ratio.mean(axis=1, dtype=np.float64) / weighted_mean
+    if "prb" in metrics:
+        lhs, rhs = _prb_design(estimate, sale_price, median_ratio[:, None])
+        out["prb"], _, _ = _prb_fit(
+            lhs,
+            rhs,
+            lambda x: x.mean(axis=1, keepdims=True, dtype=np.float64).astype(
+                x.dtype
+            ),
+            lambda x, y: (x * y).sum(axis=1, dtype=np.float64),
+        )
+    if {"mki", "ki"} & set(metrics):
+        gini_assessed, gini_sale_price = _gini_batch(estimate, sale_price)
+        out["mki"] = gini_assessed / gini_sale_price
+        out["ki"] = gini_assessed - gini_sale_price
+
+    return np.column_stack([out[name] for name in metrics])
+
+
+def _metrics_weighted_batch(
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    counts: np.ndarray,
+    metrics: tuple[str, ...],
+    row_index: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Row-wise values of several metrics for samples given as the number of
+    times each sale appears in them. ``estimate`` and ``sale_price`` are 1-D
+    arrays sorted by ratio, and ``counts`` has shape ``(B, b)``, such as
+    multinomial bootstrap weights. ``row_index`` is the position of each
+    sale in the original input, used to break ties in sale price for the
+    Gini coefficients (see _gini_weighted_batch()). Equivalent to
+    _metrics_batch() on the expanded samples in input order. See
+    _metrics_batch().
+    """
+    counts = counts.astype(np.float64)
+    n = counts.sum(axis=1)
+    ratio = estimate / sale_price
+    out: dict[str, np.ndarray] = {}
+
+    if {"median_ratio", "cod", "prb"} & set(metrics):
+        median_ratio = _weighted_median_sorted(ratio, counts)
+        out["median_ratio"] = median_ratio
+    if "cod" in metrics:
+        abs_diff_sum = (counts * np.abs(ratio - median_ratio[:, None])).sum(
+            axis=1
+        )
+        out["cod"] = 100 / median_ratio * (abs_diff_sum / n)
+    if "prd" in metrics:
+        weighted_mean = (counts @ estimate) / (counts @ sale_price)
+        out["prd"] = (counts @ ratio) / n / weighted_mean
+    if "prb" in metrics:
+        lhs, rhs = _prb_design(estimate, sale_price, median_ratio[:, None])
+        out["prb"], _, _ = _prb_fit(
+            lhs,
+            rhs,
+            lambda x: (counts * x).sum(axis=1, keepdims=True) / n[:, None],
+            lambda x, y: (counts * x * y).sum(axis=1),
+        )
+    if {"mki", "ki"} & set(metrics):
+        gini_assessed, gini_sale_price = _gini_weighted_batch(
+            estimate, sale_price, counts, row_index
+        )
+        out["mki"] = gini_assessed / gini_sale_price
+        out["ki"] = gini_assessed - gini_sale_price
+
+    return np.column_stack([out[name] for name in metrics])
+
+
+def _grouped_metrics_weighted_batch(
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    counts: np.ndarray,
+    starts: np.ndarray,
+    sizes: np.ndarray,
+    metrics: tuple[str, ...],
+    row_index: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Row-wise values of several metrics within each group, for stratified
+    samples given as the number of times each sale appears in them.
+    ``estimate`` and ``sale_price`` are 1-D arrays sorted by group and
+    ratio, where group ``g`` spans ``sizes[g]`` rows from ``starts[g]``. The
+    counts of each group must sum to its size in every row of ``counts``.
+    Ties in sale price are broken by ``row_index``, as in
+    _metrics_weighted_batch(). Returns an array of shape
+    ``(B, ngroups, len(metrics))``.
+
+    Group sums are segment reductions with ``np.add.reduceat``. Since the
+    counts before group ``g`` always sum to ``starts[g]``, its ``k``-th
+    smallest ratio has rank ``starts[g] + k`` in the whole sample, and the
+    order statistics of every group and row are found with a single
+    ``np.searchsorted`` over the cumulative counts.
+    """
+    nrows, n = counts.shape
+    counts = counts.astype(np.float64)
+    group = np.repeat(np.arange(sizes.size), sizes)
+    ratio = estimate / sale_price
+    out: dict[str, np.ndarray] = {}
+
+    def group_sum(x: np.ndarray) -> np.ndarray:
+        return np.add.reduceat(x, starts, axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if {"median_ratio", "cod", "prb"} & set(metrics):
+            # Offset each row so that the cumulative counts of all rows form
+            # a single sorted array
+            row_offset = n * np.arange(nrows)[:, None]
+            cum_counts = (np.cumsum(counts, axis=1) + row_offset).ravel()
+
+            def order_stat(k: np.ndarray) -> np.ndarray:
+                pos = np.searchsorted(
+                    cum_counts, starts + k + row_offset, side="right"
+                )
+                return ratio[pos - row_offset]
+
+            median_ratio = (
+                order_stat((sizes - 1) // 2) + order_stat(sizes // 2)
+            ) / 2
+            out["median_ratio"] = median_ratio
+            row_median = median_ratio[:, group]
+        if "cod" in metrics:
+            abs_diff_sum = group_sum(counts * np.abs(ratio - row_median))
+            out["cod"] = 100 / median_ratio * (abs_diff_sum / sizes)
+        if "prd" in metrics:
+            weighted_mean = group_sum(counts * estimate) / group_sum(
+                counts * sale_price
+            )
+            out["prd"] = group_sum(counts * ratio) / sizes / weighted_mean
+        if "prb" in metrics:
+            lhs, rhs = _prb_design(estimate, sale_price, row_median)
+            out["prb"], _, _ = _prb_fit(
+                lhs,
+                rhs,
+                lambda x: (group_sum(counts * x) / sizes)[:, group],
+                lambda x, y: group_sum(counts * x * y),
+            )
+        if {"mki", "ki"} & set(metrics):
+            # Sort by group and sale price, with ties in input order. The
+            # copies of each sale take the ranks after the copies of the
+            # sales before it in the same group, see _gini_weighted_batch()
+            if row_index is None:
+                row_index = np.arange(n)
+            order = np.lexsort((row_index, sale_price, group))
+            a_sorted, sp_sorted = estimate[order], sale_price[order]
+            counts = counts[:, order]
+            cum_counts = np.cumsum(counts, axis=1) - starts[group]
+            rank_sum = (
+                counts * (cum_counts - counts) + counts * (counts + 1) / 2
+            )
+            gini_assessed = _gini_from_sums(
+                group_sum(rank_sum * a_sorted),
+                group_sum(counts * a_sorted),
+                sizes,
+            )
+            gini_sale_price = _gini_from_sums(
+                group_sum(rank_sum * sp_sorted),
+                group_sum(counts * sp_sorted),
+                sizes,
+            )
+            out["mki"] = gini_assessed / gini_sale_price
+            out["ki"] = gini_assessed - gini_sale_price
+
+    return np.stack([out[name] for name in metrics], axis=-1)
 
 
 def mki(
     estimate: Union[list[int], list[float], pd.Series],
     sale_price: Union[list[int], list[float], pd.Series],
+    validate: bool = True,
+    dtype: str = "float64",
 ) -> float:
     r"""
     The Modified Kakwani Index (MKI) is a Gini-based measure to test for
@@ -258,8 +776,19 @@ def mki(
     :param sale_price:
         A list or ``pd.Series`` of sale prices.
         Must be the same length as ``estimate``.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :param dtype:
+        Default ``float64``. Floating point type used to store the inputs and
+        intermediate arrays, either ``float64`` or ``float32``. ``float32``
+        halves memory use, while sums are still accumulated in float64. See
+        :ref:`reduced-precision` for error bounds.
     :type estimate: Array-like numeric values
     :type sale_price: Array-like numeric values
+    :type validate: bool
+    :type dtype: str
 
     :return: A single float value containing the MKI of the inputs.
     :rtype: float
@@ -273,11 +802,9 @@ def mki(
 
         ap.mki(ap.ccao_sample().estimate, ap.ccao_sample().sale_price)
     """
-    check_inputs(estimate, sale_price)
-    estimate = pd.Series(estimate, dtype=float)
-    sale_price = pd.Series(sale_price, dtype=float)
-
-    gini_assessed, gini_sale_price = _calculate_gini(estimate, sale_price)
+    gini_assessed, gini_sale_price = _calculate_gini(
+        estimate, sale_price, validate=validate, dtype=dtype
+    )
     mki = float(gini_assessed / gini_sale_price)
 
     return mki
@@ -286,6 +813,8 @@ def mki(
 def ki(
     estimate: Union[list[int], list[float], pd.Series],
     sale_price: Union[list[int], list[float], pd.Series],
+    validate: bool = True,
+    dtype: str = "float64",
 ) -> float:
     r"""
     The Kakwani Index (KI) is a Gini-based measure to test for
@@ -307,8 +836,19 @@ def ki(
     :param sale_price:
         A list or ``pd.Series`` of sale prices.
         Must be the same length as ``estimate``.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :param dtype:
+        Default ``float64``. Floating point type used to store the inputs and
+        intermediate arrays, either ``float64`` or ``float32``. ``float32``
+        halves memory use, while sums are still accumulated in float64. See
+        :ref:`reduced-precision` for error bounds.
     :type estimate: Array-like numeric values
     :type sale_price: Array-like numeric values
+    :type validate: bool
+    :type dtype: str
 
     :return: A single float value containing the PRB of the inputs.
     :rtype: float
@@ -322,12 +862,9 @@ def ki(
 
         ap.ki(ap.ccao_sample().estimate, ap.ccao_sample().sale_price)
     """
-
-    check_inputs(estimate, sale_price)
-    estimate = pd.Series(estimate, dtype=float)
-    sale_price = pd.Series(sale_price, dtype=float)
-
-    gini_assessed, gini_sale_price = _calculate_gini(estimate, sale_price)
+    gini_assessed, gini_sale_price = _calculate_gini(
+        estimate, sale_price, validate=validate, dtype=dtype
+    )
     ki = float(gini_assessed - gini_sale_price)
 
     return ki
@@ -1,42 +1,133 @@
 import warnings
 from typing import Union
 
+import numpy as np
 import pandas as pd
 
-from .utils import check_inputs
+from .utils import _group_codes, check_inputs
 
 
-def _quantile_outlier(
-    x: Union[list[int], list[float], pd.Series],
-    probs: tuple[float, float] = (0.05, 0.95),
-) -> pd.Series:
+class OutlierWarning(UserWarning):
     """
-    Quantile method for identifying outliers. This simply identifies data
-    within the percentiles specified in the ``probs`` parameter.
+    Warning raised once by :func:`is_outlier` when outliers are flagged by
+    group and some groups have small samples or narrow distributions. The
+    ``summary`` attribute holds a ``pd.DataFrame`` with one row per affected
+    group.
     """
-    check_inputs(x, check_gt_zero=False)
-    x = pd.Series(x)
 
-    # Determine which input values are in the valid quantile range
-    valid_range = [x.quantile(q=probs[0]), x.quantile(q=probs[1])]
-    out = (x < valid_range[0]) | (x > valid_range[1])
+    def __init__(self, message: str, summary: pd.DataFrame) -> None:
+        super().__init__(message)
+        self.summary = summary
 
-    return out
 
+def _interpolate(
+    lower: np.ndarray, upper: np.ndarray, gamma: np.ndarray
+) -> np.ndarray:
+    """
+    Linear interpolation between adjacent order statistics, computed from
+    whichever neighbor is closer, same as ``np.quantile``.
+    """
+    diff = upper - lower
+
+    return np.where(
+        gamma >= 0.5, upper - diff * (1 - gamma), lower + diff * gamma
+    )
 
-def _iqr_outlier(
-    x: Union[list[int], list[float], pd.Series], mult: float = 3.0
-) -> pd.Series:
+
+def _quantiles(x: np.ndarray, probs) -> np.ndarray:
+    """
+    Quantiles of a 1-D array with linear interpolation, same as the default
+    method of ``np.quantile``. Every order statistic needed for all ``probs``
+    is selected with a single ``np.partition`` call, instead of one
+    partition (and one copy of ``x``) per ``np.quantile`` call.
+    """
+    probs = np.asarray(probs, dtype=float)
+    virtual_idx = probs * (x.size - 1)
+    lower_idx = np.floor(virtual_idx).astype(np.intp)
+    upper_idx = np.minimum(lower_idx + 1, x.size - 1)
+    kth = np.unique(np.concatenate((lower_idx, upper_idx)))
+    x_part = np.partition(x, kth)
+
+    return _interpolate(
+        x_part[lower_idx], x_part[upper_idx], virtual_idx - lower_idx
+    )
+
+
+def _grouped_quantiles(
+    x_sorted: np.ndarray, starts: np.ndarray, n: np.ndarray, probs
+) -> np.ndarray:
+    """
+    Quantiles of each group, given values sorted by group and then by value,
+    and the start position and size of each group. Returns an array of shape
+    ``(len(probs), ngroups)``.
+    """
+    virtual_idx = np.multiply.outer(np.asarray(probs, dtype=float), n - 1)
+    lower_idx = np.floor(virtual_idx).astype(np.intp)
+    upper_idx = np.minimum(lower_idx + 1, n - 1)
+
+    return _interpolate(
+        x_sorted[starts + lower_idx],
+        x_sorted[starts + upper_idx],
+        virtual_idx - lower_idx,
+    )
+
+
+def _grouped_is_outlier(
+    x: np.ndarray,
+    by,
+    method: str = "iqr",
+    probs: tuple[float, float] = (0.05, 0.95),
+    mult: float = 3.0,
+) -> np.ndarray:
     """
-    IQR method for identifying outliers as specified in Appendix B.1
-    of the IAAO Standard on Ratio Studies.
+    Flag outliers within each group of ``by`` in a single vectorized pass.
+    Values are sorted once by group and value, then the fences of every
+    group are read from the sorted segments. Warnings for all groups are
+    collected into a single ``OutlierWarning``.
     """
-    check_inputs(x, check_gt_zero=False)
-    x = pd.Series(x)
+    codes, group_keys = _group_codes(by, x.size)
+    ngroups = len(group_keys)
 
-    quartiles = [x.quantile(q=0.25), x.quantile(q=0.75)]
-    iqr_mult = mult * (quartiles[1] - quartiles[0])
-    out = (x < (quartiles[0] - iqr_mult)) | (x > (quartiles[1] + iqr_mult))
+    n = np.bincount(codes, minlength=ngroups)
+    starts = np.concatenate(([0], np.cumsum(n)[:-1]))
+    x_sorted = x[np.lexsort((x, codes))]
+
+    if method == "iqr":
+        q25, q75, q05, q95 = _grouped_quantiles(
+            x_sorted, starts, n, [0.25, 0.75, 0.05, 0.95]
+        )
+        iqr_mult = mult * (q75 - q25)
+        lower, upper = q25 - iqr_mult, q75 + iqr_mult
+    else:
+        lower, upper = _grouped_quantiles(x_sorted, starts, n, probs)
+    out = (x < lower[codes]) | (x > upper[codes])
+
+    n_outliers = np.bincount(codes, weights=out, minlength=ngroups)
+    summary = pd.DataFrame(
+        {"n": n, "n_outliers": n_outliers.astype(np.intp)},
+        index=group_keys,
+    )
+    if method == "iqr":
+        iqr_quant = out & (x >= q05[codes]) & (x <= q95[codes])
+        summary["n_narrow"] = np.bincount(
+            codes, weights=iqr_quant, minlength=ngroups
+        ).astype(np.intp)
+    else:
+        summary["n_narrow"] = 0
+    summary["small_sample"] = (summary["n_outliers"] > 0) & (n < 30)
+
+    summary = summary[(summary["n_narrow"] > 0) | summary["small_sample"]]
+    if len(summary):
+        warnings.warn(
+            OutlierWarning(
+                f"Outliers flagged despite being within 95% CI in "
+                f"{(summary['n_narrow'] > 0).sum()} groups, and despite "
+                f"small sample size (N < 30) in "
+                f"{summary['small_sample'].sum()} groups. See the 'summary' "
+                "attribute of this warning for details.",
+                summary.reset_index(),
+            )
+        )
 
     return out
 
@@ -46,6 +137,9 @@ def is_outlier(
     method: str = "iqr",
     probs: tuple[float, float] = (0.05, 0.95),
     mult: float = 3.0,
+    validate: bool = True,
+    dtype: str = "float64",
+    by=None,
 ) -> pd.Series:
     """
     Detect outliers in numeric values using standard methods.
@@ -59,6 +153,15 @@ def is_outlier(
     narrow. See IAAO Standard on Ratio Studies Appendix B. Outlier Trimming
     Guidelines for more information.
 
+    IAAO trimming is usually done per stratum, e.g. per township and class.
+    Passing the group of each value as ``by`` computes the fences of every
+    group at once, in a single vectorized pass. In that case, warnings for
+    all groups are combined into one :class:`OutlierWarning`, whose
+    ``summary`` attribute lists each affected group, its number of values
+    ``n``, its number of outliers ``n_outliers``, the number of outliers
+    within the 5% and 95% quantiles ``n_narrow``, and whether outliers were
+    flagged in a small sample (``small_sample``).
+
     :param x:
         A list or ``pd.Series`` of numeric values, typically sales ratios.
         Must be longer than 2 and cannot contain ``Inf`` or ``NaN`` values.
@@ -70,10 +173,26 @@ def is_outlier(
     :param mult:
         Default ``3``. Multiple of IQR to use as the outlier detection
         threshold.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :param dtype:
+        Default ``float64``. Floating point type used to store the input,
+        either ``float64`` or ``float32``. ``float32`` halves memory use. See
+        :ref:`reduced-precision` for error bounds.
+    :param by:
+        Default ``None``. Group of each value, as a list, NumPy array or
+        ``pd.Series`` the same length as ``x``, or a ``pd.DataFrame`` with one
+        column per grouping variable (e.g. township and class). Matched to
+        ``x`` by position. If given, outliers are flagged within each group.
     :type x: Array-like numeric values
     :type method: str
     :type probs: tuple[float]
     :type mult: float
+    :type validate: bool
+    :type dtype: str
+    :type by: Array-like or pd.DataFrame
 
     :return:
         A boolean ``pd.Series`` the same length as ``x`` indicating whether or
@@ -88,26 +207,48 @@ def is_outlier(
         import assesspy as ap
 
         ap.is_outlier(ap.ccao_sample().estimate)
+
+        # Detect outliers in the ratios of each township:
+        sample = ap.ccao_sample()
+        ap.is_outlier(
+            sample.estimate / sample.sale_price, by=sample.township_name
+        )
     """
+    index = x.index if isinstance(x, pd.Series) else None
+    (x,) = check_inputs(x, check_gt_zero=False, validate=validate, dtype=dtype)
+
+    if by is not None:
+        if method not in ("iqr", "quantile"):
+            raise ValueError("Method must be either 'iqr' or 'quantile'")
+        out = _grouped_is_outlier(x, by, method, probs, mult)
+        return pd.Series(out, index=index)
+
     if method == "iqr":
-        out = _iqr_outlier(x, mult)
-        iqr_quant = out & ~_quantile_outlier(x)
-        if any(iqr_quant):
+        # IQR method as specified in Appendix B.1 of the IAAO Standard on
+        # Ratio Studies. Values flagged despite being within the 5% and 95%
+        # quantiles trigger a warning, so all four are selected at once
+        q25, q75, q05, q95 = _quantiles(x, [0.25, 0.75, 0.05, 0.95])
+        iqr_mult = mult * (q75 - q25)
+        out = (x < (q25 - iqr_mult)) | (x > (q75 + iqr_mult))
+        iqr_quant = out & (x >= q05) & (x <= q95)
+        if iqr_quant.any():
             warnings.warn(
                 f"{iqr_quant.sum()} values flagged as outliers despite being "
                 "within 95% CI. Check for narrow or skewed distribution."
             )
     elif method == "quantile":
-        out = _quantile_outlier(x, probs)
+        # Identify values outside the percentiles specified in ``probs``
+        lower, upper = _quantiles(x, probs)
+        out = (x < lower) | (x > upper)
     else:
         raise ValueError("Method must be either 'iqr' or 'quantile'")
 
     # Warn about removing data from small samples, as it can severely distort
     # ratio study outcomes
-    if any(out) & (out.size < 30):
+    if out.any() & (out.size < 30):
         warnings.warn(
             f"{out.sum()} flagged as outliers despite small sample size "
             "(N < 30). Use caution when removing values from a small sample."
         )
 
-    return out
+    return pd.Series(out, index=index)
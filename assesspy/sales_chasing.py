@@ -3,43 +3,114 @@ from typing import Union
 
 import numpy as np
 import pandas as pd
-from statsmodels.distributions.empirical_distribution import ECDF
+from scipy.special import ndtr
 
-from .utils import check_inputs
+from .utils import _group_codes, check_inputs
 
 
-def _cdf_sales_chased(
-    x: Union[list[int], list[float], pd.Series],
+def _cdf_sales_chased_batch(
+    x: np.ndarray,
+    codes: np.ndarray,
+    ngroups: int,
     bounds: tuple[float, float] = (0.98, 1.02),
     gap: float = 0.05,
-) -> bool:
-    check_inputs(x, check_gt_zero=False)
-    ratio = pd.Series(x)
-    sorted_ratio = ratio.sort_values()
+) -> np.ndarray:
+    """
+    CDF method for many groups at once. ``codes`` holds the group of each
+    value, from 0 to ``ngroups - 1``, and every group must be non-empty.
+
+    The empirical CDF only jumps at each distinct value, by the number of
+    times that value occurs divided by the group size. So the largest CDF
+    gap is found by sorting the values once by group and value, then
+    counting the runs of tied values. As with the ECDF differences, the
+    first value of each group has no gap before it, and ties for the
+    largest gap are resolved to the smallest value.
+    """
+    order = np.lexsort((x, codes))
+    x_sorted, codes_sorted = x[order], codes[order]
+    n = np.bincount(codes, minlength=ngroups)
 
-    # Calculate the CDF of the sorted ratios and extract percentile ranking
-    cdf = pd.Series(ECDF(sorted_ratio)(sorted_ratio))
+    new_group = np.ones(x.size, dtype=bool)
+    new_group[1:] = codes_sorted[1:] != codes_sorted[:-1]
+    new_run = new_group.copy()
+    new_run[1:] |= x_sorted[1:] != x_sorted[:-1]
 
-    # Calculate the difference between each value and the next value, the
-    # largest difference will be the CDF gap
-    diffs = cdf.diff().dropna()
+    run_starts = np.flatnonzero(new_run)
+    run_counts = np.diff(np.append(run_starts, x.size))
+    run_values = x_sorted[run_starts]
+    run_groups = codes_sorted[run_starts]
+    is_first_run = new_group[run_starts]
+    first_runs = np.flatnonzero(is_first_run)
+
+    # Largest count of tied values in each group, excluding its first value
+    gap_counts = np.where(is_first_run, 0, run_counts)
+    max_counts = np.maximum.reduceat(gap_counts, first_runs)
+
+    # Location of the largest gap. Groups where every value is the same
+    # have no gap, and keep their only value as the location
+    diff_loc = run_values[first_runs]
+    is_max = ~is_first_run & (gap_counts == max_counts[run_groups])
+    max_runs = np.flatnonzero(is_max)
+    max_groups, first_max = np.unique(run_groups[max_runs], return_index=True)
+    diff_loc[max_groups] = run_values[max_runs[first_max]]
 
     # Check if the largest difference is greater than the threshold and make
     # sure it's within the specified boundaries
-    diff_loc = sorted_ratio.iloc[int(diffs.idxmax())]
-    out = (diffs.max() > gap) & (
-        (diff_loc > bounds[0]) & (diff_loc < bounds[1])
+    return (
+        (max_counts / n > gap)
+        & (diff_loc > bounds[0])
+        & (diff_loc < bounds[1])
     )
 
-    return bool(out)
+
+def _cdf_sales_chased(
+    x: np.ndarray,
+    bounds: tuple[float, float] = (0.98, 1.02),
+    gap: float = 0.05,
+) -> bool:
+    codes = np.zeros(x.size, dtype=np.intp)
+
+    return bool(_cdf_sales_chased_batch(x, codes, 1, bounds, gap)[0])
+
+
+def _normal_pct_in_range(
+    mean: np.ndarray, std: np.ndarray, bounds: tuple[float, float]
+) -> np.ndarray:
+    """
+    Exact share of a normal distribution with the given mean and standard
+    deviation that falls within ``bounds``, computed from the normal CDF.
+    A zero standard deviation puts all the mass at the mean.
+    """
+    mean, std = np.asarray(mean, dtype=float), np.asarray(std, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = ndtr((bounds[1] - mean) / std) - ndtr((bounds[0] - mean) / std)
+
+    return np.where(std > 0, pct, (mean >= bounds[0]) & (mean <= bounds[1]))
+
+
+def _dist_sales_chased_batch(
+    mean: np.ndarray,
+    std: np.ndarray,
+    pct_actual: np.ndarray,
+    bounds: tuple[float, float] = (0.98, 1.02),
+    gap: float = 0.05,
+) -> np.ndarray:
+    """
+    Distribution method for many groups at once. Takes the mean, standard
+    deviation and observed share of ratios within ``bounds`` for each group,
+    and compares the observed share to that of the ideal normal distribution.
+    """
+    pct_ideal = _normal_pct_in_range(mean, std, bounds)
+
+    return np.abs(np.asarray(pct_actual) - pct_ideal) > gap
 
 
 def _dist_sales_chased(
-    x: Union[list[int], list[float], pd.Series],
+    x: np.ndarray,
     bounds: tuple[float, float] = (0.98, 1.02),
     gap: float = 0.05,
+    exact: bool = False,
 ) -> bool:
-    check_inputs(x, check_gt_zero=False)
     ratio = pd.Series(x)
 
     # Return the percentage of x within the specified range
@@ -49,23 +120,78 @@ def _dist_sales_chased(
         out = float(np.mean(((x >= min) & (x <= max))))
         return out
 
+    pct_actual = pct_in_range(ratio, bounds[0], bounds[1])
+    if exact:
+        out = _dist_sales_chased_batch(
+            np.mean(ratio), np.std(ratio), pct_actual, bounds, gap
+        )
+        return bool(out)
+
     # Calculate the ideal normal distribution using observed values from input
     ideal_dist = np.random.normal(np.mean(ratio), np.std(ratio), 10000)
 
     # Determine what percentage of the data would be within the specified
     # bounds in the ideal distribution
     pct_ideal = pct_in_range(ideal_dist, bounds[0], bounds[1])
-    pct_actual = pct_in_range(ratio, bounds[0], bounds[1])
 
     return bool(abs(pct_actual - pct_ideal) > gap)
 
 
+def _grouped_sales_chased(
+    x: np.ndarray,
+    by,
+    method: str = "both",
+    bounds: tuple[float, float] = (0.98, 1.02),
+    gap: float = 0.05,
+) -> pd.DataFrame:
+    """
+    Run the sales chasing heuristics for every group of ``by`` at once. The
+    CDF method sorts all values once, and the distribution method only needs
+    the mean, standard deviation and share of values within ``bounds`` of
+    each group, which are computed with segment sums.
+    """
+    codes, group_keys = _group_codes(by, x.size)
+    ngroups = len(group_keys)
+    n = np.bincount(codes, minlength=ngroups)
+
+    out = pd.DataFrame({"n": n}, index=group_keys)
+    if method in ("cdf", "both"):
+        out["cdf"] = _cdf_sales_chased_batch(x, codes, ngroups, bounds, gap)
+    if method in ("dist", "both"):
+        mean = np.bincount(codes, weights=x, minlength=ngroups) / n
+        dev = x - mean[codes]
+        std = np.sqrt(
+            np.bincount(codes, weights=dev**2, minlength=ngroups) / n
+        )
+        in_range = (x >= bounds[0]) & (x <= bounds[1])
+        pct_actual = (
+            np.bincount(codes, weights=in_range, minlength=ngroups) / n
+        )
+        out["dist"] = _dist_sales_chased_batch(
+            mean, std, pct_actual, bounds, gap
+        )
+    out["is_sales_chased"] = out.get("cdf", True) & out.get("dist", True)
+
+    n_small = int((n < 30).sum())
+    if n_small:
+        warnings.warn(
+            "Sales chasing detection can be misleading when applied to small "
+            f"samples (N < 30). {n_small} groups have fewer than 30 values. "
+            "Increase N or use a different test method."
+        )
+
+    return out.reset_index()
+
+
 def is_sales_chased(
     x: Union[list[int], list[float], pd.Series],
     method="both",
     bounds: tuple[float, float] = (0.98, 1.02),
     gap: float = 0.05,
-) -> bool:
+    exact: bool = False,
+    validate: bool = True,
+    by=None,
+) -> Union[bool, pd.DataFrame]:
     """
     Sales chasing is when a property is selectively reappraised to
     shift its assessed value toward its recent sale price. Sales chasing is
@@ -89,6 +215,9 @@ def is_sales_chased(
 
     .. _IAAO Standard on Ratio Studies: https://www.iaao.org/media/standards/Standard_on_Ratio_Studies.pdf
 
+    Passing the group of each value as ``by`` runs both methods for every
+    group (e.g. every township) at once and returns one row per group.
+
     :param x:
         A list or ``pd.Series`` of numeric values. Must be longer than 2
         and cannot contain ``Inf`` or ``NaN`` values.
@@ -107,15 +236,35 @@ def is_sales_chased(
         distribution method, it sets the maximum percentage point difference
         between the percentage of the data between the ``bounds`` in the real
         distribution compared to the ideal distribution.
+    :param exact:
+        Default ``False``. For the distribution method, compute the
+        percentage of the ideal normal distribution within ``bounds`` exactly
+        from the normal CDF, instead of estimating it from 10,000 random
+        draws. This is faster and makes the result deterministic.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :param by:
+        Default ``None``. Group of each value, as a list, NumPy array or
+        ``pd.Series`` the same length as ``x``, or a ``pd.DataFrame`` with one
+        column per grouping variable. Matched to ``x`` by position. For the
+        distribution method, groups always use the exact normal CDF.
     :type x: Array-like numeric values
     :type method: str
     :type bounds: tuple[float, float]
     :type gap: float
+    :type exact: bool
+    :type validate: bool
+    :type by: Array-like or pd.DataFrame
 
     :return:
         A boolean value indicating whether or not the input values may
-        have been sales chased.
-    :rtype: bool
+        have been sales chased. If ``by`` is given, a ``pd.DataFrame`` with
+        one row per group instead, containing the grouping columns, the
+        number of values ``n``, the result of each method (``cdf`` and/or
+        ``dist``) and the combined result ``is_sales_chased``.
+    :rtype: bool or pd.DataFrame
 
     :Example:
 
@@ -140,6 +289,12 @@ def is_sales_chased(
         pyplot.plot(ecdf.x, ecdf.y)
         pyplot.show()
         ap.is_sales_chased(chased_ratios)
+
+        # Check each township for sales chasing:
+        sample = ap.ccao_sample()
+        ap.is_sales_chased(
+            sample.estimate / sample.sale_price, by=sample.township_name
+        )
     """
     if not (0 < gap < 1):
         raise ValueError("Gap must be a positive value less than 1.")
@@ -149,14 +304,20 @@ def is_sales_chased(
         raise ValueError(
             "Bounds must have the left value lower than the right value."
         )
+    (x,) = check_inputs(x, check_gt_zero=False, validate=validate)
+
+    if by is not None:
+        if method not in ("cdf", "dist", "both"):
+            raise ValueError("Method must be either 'cdf' or 'dist'")
+        return _grouped_sales_chased(x, by, method, bounds, gap)
 
     if method == "cdf":
         out = _cdf_sales_chased(x, bounds, gap)
     elif method == "dist":
-        out = _dist_sales_chased(x, bounds, gap)
+        out = _dist_sales_chased(x, bounds, gap, exact)
     elif method == "both":
         out_cdf = _cdf_sales_chased(x, bounds, gap)
-        out_dist = _dist_sales_chased(x, bounds, gap)
+        out_dist = _dist_sales_chased(x, bounds, gap, exact)
         out = bool(out_cdf & out_dist)
     else:
         raise ValueError("Method must be either 'cdf' or 'dist'")
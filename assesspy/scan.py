@@ -0,0 +1,107 @@
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .streaming import stream_metrics
+from .study import ratio_study
+
+if TYPE_CHECKING:
+    import pyarrow.compute as pc
+
+
+def scan_parquet(
+    path: Union[str, list[str]],
+    estimate: str = "estimate",
+    sale_price: str = "sale_price",
+    by: Union[str, list[str], None] = None,
+    filter: Optional["pc.Expression"] = None,
+    validate: bool = True,
+) -> pd.DataFrame:
+    """
+    Calculate ratio statistics directly from a parquet file or a partitioned
+    parquet dataset, using ``pyarrow.dataset``.
+
+    Only the estimate, sale price and grouping columns are read from disk,
+    and ``filter`` is pushed down to the scan, so that row groups and
+    partitions that cannot match are skipped. Hive-style partition keys
+    (e.g. ``township=Evanston/``) can be used in ``by`` and ``filter``.
+
+    Without ``by``, record batches are fed to :func:`stream_metrics`, so
+    memory use is bounded by the batch size rather than by the size of the
+    dataset. The dataset is scanned several times, once per pass. With
+    ``by``, only the projected columns are loaded into memory and all groups
+    are calculated at once with :func:`ratio_study`.
+
+    :param path:
+        Path to a parquet file, a directory containing a (possibly
+        partitioned) parquet dataset, or a list of parquet files.
+    :param estimate:
+        Default ``estimate``. Name of the column containing estimated values.
+    :param sale_price:
+        Default ``sale_price``. Name of the column containing sale prices.
+    :param by:
+        Default ``None``. Name or list of names of the columns to group by.
+    :param filter:
+        Default ``None``. A ``pyarrow.compute.Expression`` used to select
+        rows, e.g. ``pc.field("year") == 2023``.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :type path: str or list[str]
+    :type estimate: str
+    :type sale_price: str
+    :type by: str or list[str]
+    :type filter: pyarrow.compute.Expression
+    :type validate: bool
+
+    :return:
+        A ``pd.DataFrame``. Without ``by``, it has a single row containing
+        the number of sales ``n``, the median ratio, COD, PRD and PRB. With
+        ``by``, it has one row per group, same as :func:`ratio_study`.
+    :rtype: pd.DataFrame
+
+    :Example:
+
+    .. code-block:: python
+
+        # Calculate ratio statistics by township for a single year:
+        import assesspy as ap
+        import pyarrow.compute as pc
+
+        ap.scan_parquet(
+            "sales/",
+            by="township_name",
+            filter=pc.field("year") == 2023,
+        )
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+
+    if by is None:
+
+        def chunks() -> Iterator[tuple[np.ndarray, np.ndarray]]:
+            for batch in dataset.to_batches(
+                columns=[estimate, sale_price], filter=filter
+            ):
+                yield (
+                    batch.column(0).to_numpy(zero_copy_only=False),
+                    batch.column(1).to_numpy(zero_copy_only=False),
+                )
+
+        out = stream_metrics(chunks, validate=validate)
+        return pd.DataFrame([out])[["n", "median_ratio", "cod", "prd", "prb"]]
+
+    by = [by] if isinstance(by, str) else list(by)
+    columns = list(dict.fromkeys([*by, estimate, sale_price]))
+    df = dataset.to_table(columns=columns, filter=filter).to_pandas()
+
+    return ratio_study(
+        df,
+        by=by,
+        estimate=estimate,
+        sale_price=sale_price,
+        validate=validate,
+    )
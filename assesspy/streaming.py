@@ -0,0 +1,272 @@
+from typing import Callable, Iterable, Iterator, Union
+
+import numpy as np
+
+from .metrics import _prb_design
+from .utils import check_inputs
+
+Chunk = tuple[np.ndarray, np.ndarray]
+ChunkSource = Union[Callable[[], Iterable[Chunk]], Iterable[Chunk]]
+
+# Number of bits of each ratio resolved per histogram pass during selection
+_RADIX_BITS: int = 16
+
+# Once no more than this many values can hold the target order statistic,
+# they are collected in memory and the selection finishes with a partition
+_MAX_BUFFER: int = 2**20
+
+
+def _chunk_factory(chunks: ChunkSource) -> Callable[[], Iterator[Chunk]]:
+    """
+    Helper function to turn ``chunks`` into a function returning a fresh
+    iterator, since exact streaming metrics need more than one pass.
+    """
+    if callable(chunks):
+        return lambda: iter(chunks())
+    if iter(chunks) is chunks:
+        raise TypeError(
+            "Chunks must be re-iterable (e.g. a list) or a function that "
+            "returns a new iterator, since metrics need multiple passes."
+        )
+    return lambda: iter(chunks)
+
+
+def _ratio_chunks(
+    make_iter: Callable[[], Iterator[Chunk]],
+) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Helper function to yield (estimate, sale_price, ratio) arrays for each
+    chunk. Inputs are only converted here, they are validated in pass one.
+    """
+    for estimate, sale_price in make_iter():
+        estimate, sale_price = check_inputs(
+            estimate, sale_price, validate=False
+        )
+        yield estimate, sale_price, estimate / sale_price
+
+
+class _Moments:
+    """
+    Mergeable sufficient statistics for a single regressor least squares
+    fit. Chunks are combined with the pairwise update of Chan et al., which
+    avoids the cancellation of naive sum of squares accumulators.
+    """
+
+    def __init__(self) -> None:
+        self.n: int = 0
+        self.mean_x: float = 0.0
+        self.mean_y: float = 0.0
+        self.ss_x: float = 0.0
+        self.sp_xy: float = 0.0
+
+    def update(self, x: np.ndarray, y: np.ndarray) -> None:
+        n_b = x.size
+        if n_b == 0:
+            return
+        mean_x_b, mean_y_b = float(x.mean()), float(y.mean())
+        x_dev, y_dev = x - mean_x_b, y - mean_y_b
+
+        n = self.n + n_b
+        delta_x, delta_y = mean_x_b - self.mean_x, mean_y_b - self.mean_y
+        weight = self.n * n_b / n
+        self.mean_x += delta_x * n_b / n
+        self.mean_y += delta_y * n_b / n
+        self.ss_x += float(x_dev @ x_dev) + delta_x**2 * weight
+        self.sp_xy += float(x_dev @ y_dev) + delta_x * delta_y * weight
+        self.n = n
+
+    def slope(self) -> float:
+        return self.sp_xy / self.ss_x
+
+
+def _resolve_digit(target: list[int], hist: np.ndarray) -> None:
+    """
+    Helper function to move a selection target down one digit, given the
+    histogram of the next digit among the values matching its prefix.
+    Updates the target's prefix, resolved bits, rank and candidate count.
+    """
+    prefix, nbits, rank, _ = target
+    cum_hist = np.cumsum(hist)
+    digit = int(np.searchsorted(cum_hist, rank, side="right"))
+    below = int(cum_hist[digit - 1]) if digit > 0 else 0
+    target[:] = [
+        (prefix << _RADIX_BITS) | digit,
+        nbits + _RADIX_BITS,
+        rank - below,
+        int(hist[digit]),
+    ]
+
+
+def _exact_order_stats(
+    make_iter: Callable[[], Iterator[Chunk]],
+    hist: np.ndarray,
+    ranks: list[int],
+) -> dict[int, float]:
+    """
+    Find the exact order statistics of the ratios at each (0-based) rank
+    using bounded memory. Positive float64 values sort in the same order as
+    their bit patterns, so this is a radix select over the bits of each
+    ratio. ``hist`` is the histogram of the leading ``_RADIX_BITS`` bits of
+    all ratios, built during the first pass over the data. Each extra pass
+    either resolves the next ``_RADIX_BITS`` bits of every unresolved target,
+    or, once few enough candidates remain, collects and partitions them.
+    """
+    out: dict[int, float] = {}
+    # Per target: [prefix bits, number of bits resolved, rank within the
+    # values matching the prefix, number of values matching the prefix]
+    targets: dict[int, list[int]] = {}
+    for rank in set(ranks):
+        targets[rank] = [0, 0, rank, 0]
+        _resolve_digit(targets[rank], hist)
+
+    while True:
+        for rank, (prefix, nbits, _, _) in targets.items():
+            if nbits == 64:
+                out[rank] = float(np.uint64(prefix).view(np.float64))
+        pending = {r: t for r, t in targets.items() if r not in out}
+        if not pending:
+            return out
+
+        hists: dict[int, np.ndarray] = {}
+        buffers: dict[int, list[np.ndarray]] = {r: [] for r in pending}
+        for _, _, ratio in _ratio_chunks(make_iter):
+            bits = ratio.view(np.uint64)
+            for rank, (prefix, nbits, _, count) in pending.items():
+                matches = bits[(bits >> np.uint64(64 - nbits)) == prefix]
+                if count <= _MAX_BUFFER:
+                    buffers[rank].append(matches)
+                    continue
+                shift = np.uint64(64 - nbits - _RADIX_BITS)
+                digits = (matches >> shift) & np.uint64(2**_RADIX_BITS - 1)
+                hists[rank] = hists.get(rank, 0) + np.bincount(
+                    digits.astype(np.intp), minlength=2**_RADIX_BITS
+                )
+
+        for rank, target in pending.items():
+            if rank in hists:
+                _resolve_digit(target, hists[rank])
+            else:
+                values = np.concatenate(buffers[rank])
+                selected = np.partition(values, target[2])[target[2]]
+                out[rank] = float(selected.view(np.float64))
+
+
+def stream_metrics(
+    chunks: ChunkSource,
+    metrics: Iterable[str] = ("median_ratio", "cod", "prd", "prb"),
+    validate: bool = True,
+) -> dict[str, float]:
+    """
+    Calculate exact ratio statistics over data that is too large to hold in
+    memory, supplied as chunks of estimates and sale prices.
+
+    Memory use is bounded by the chunk size, not by the total number of
+    rows. The data is read in several passes:
+
+    1. Validate every chunk, count rows, accumulate the PRD sums and build a
+       histogram of the leading bits of each ratio.
+    2. Find the exact median ratio with a bounded-memory radix select. Each
+       pass narrows down the candidates by another 16 bits. Once few enough
+       candidates remain, they are collected and the median is selected
+       directly. This typically takes one or two passes.
+    3. Accumulate the COD absolute deviations and the PRB least squares
+       sufficient statistics, which both depend on the median ratio.
+
+    Only the passes required by the requested ``metrics`` are run, e.g. PRD
+    alone needs a single pass.
+
+    :param chunks:
+        Either a re-iterable collection (such as a list) of
+        ``(estimate, sale_price)`` tuples, or a function that returns a new
+        iterator of such tuples each time it is called (e.g. a function
+        reading a file in batches). Each tuple holds array-like numeric
+        values of equal length. A one-shot iterator is not accepted, since
+        the data must be read more than once.
+    :param metrics:
+        Default ``("median_ratio", "cod", "prd", "prb")``. Names of the
+        statistics to calculate.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :type chunks: Iterable or function
+    :type metrics: Iterable[str]
+    :type validate: bool
+
+    :return:
+        A dictionary containing the number of sales ``n`` and the value of
+        each requested statistic.
+    :rtype: dict[str, float]
+
+    :Example:
+
+    .. code-block:: python
+
+        # Calculate COD, PRD and PRB from a large CSV file:
+        import assesspy as ap
+        import pandas as pd
+
+        def chunks():
+            for df in pd.read_csv("sales.csv", chunksize=1_000_000):
+                yield df["estimate"], df["sale_price"]
+
+        ap.stream_metrics(chunks)
+    """
+    metrics = list(metrics)
+    valid_metrics = {"median_ratio", "cod", "prd", "prb"}
+    if not set(metrics) <= valid_metrics:
+        raise ValueError(
+            f"Metrics must be one or more of {sorted(valid_metrics)}."
+        )
+    make_iter = _chunk_factory(chunks)
+
+    # Pass one: validate, count, PRD sums and leading bits histogram
+    n: int = 0
+    ratio_sum = estimate_sum = sale_price_sum = 0.0
+    hist = np.zeros(2**_RADIX_BITS, dtype=np.int64)
+    for estimate, sale_price in make_iter():
+        estimate, sale_price = check_inputs(
+            estimate, sale_price, check_length=False, validate=validate
+        )
+        ratio = estimate / sale_price
+        n += ratio.size
+        ratio_sum += float(ratio.sum())
+        estimate_sum += float(estimate.sum())
+        sale_price_sum += float(sale_price.sum())
+        hist += np.bincount(
+            (ratio.view(np.uint64) >> np.uint64(64 - _RADIX_BITS)).astype(
+                np.intp
+            ),
+            minlength=2**_RADIX_BITS,
+        )
+    if n <= 1:
+        raise Exception("All input values must have length greater than 1.")
+
+    out: dict[str, float] = {"n": n}
+    if "prd" in metrics:
+        out["prd"] = (ratio_sum / n) / (estimate_sum / sale_price_sum)
+    if not {"median_ratio", "cod", "prb"} & set(metrics):
+        return out
+
+    # Pass two: exact median ratio
+    order_stats = _exact_order_stats(make_iter, hist, [(n - 1) // 2, n // 2])
+    median_ratio = (order_stats[(n - 1) // 2] + order_stats[n // 2]) / 2
+    if "median_ratio" in metrics:
+        out["median_ratio"] = median_ratio
+    if not {"cod", "prb"} & set(metrics):
+        return out
+
+    # Pass three: statistics that depend on the median ratio
+    abs_diff_sum = 0.0
+    moments = _Moments()
+    for estimate, sale_price, ratio in _ratio_chunks(make_iter):
+        abs_diff_sum += float(np.abs(ratio - median_ratio).sum())
+        lhs, rhs = _prb_design(estimate, sale_price, median_ratio)
+        moments.update(rhs, lhs)
+
+    if "cod" in metrics:
+        out["cod"] = 100 / median_ratio * (abs_diff_sum / n)
+    if "prb" in metrics:
+        out["prb"] = moments.slope()
+
+    return out
@@ -0,0 +1,285 @@
+from functools import cached_property
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from .metrics import (
+    _gini_coef,
+    _gini_from_sums,
+    _prb_design,
+    _prb_fit,
+    _prb_ols,
+)
+from .utils import check_inputs
+
+
+def _grouped_metrics(
+    codes: np.ndarray,
+    estimate: np.ndarray,
+    sale_price: np.ndarray,
+    ngroups: int,
+) -> dict[str, np.ndarray]:
+    """
+    Helper function to calculate every ratio study metric for each group in a
+    single pass. ``codes`` must contain an integer group code between 0 and
+    ``ngroups - 1`` for each row, and every group must have at least one
+    row. Rows are sorted once by group and ratio (for medians) and once by
+    group and sale price (for Gini coefficients). All other metrics are
+    computed with segment sums via ``np.bincount``.
+    """
+    ratio = estimate / sale_price
+    n = np.bincount(codes, minlength=ngroups)
+    starts = np.concatenate(([0], np.cumsum(n)[:-1]))
+
+    def group_sum(x: np.ndarray) -> np.ndarray:
+        return np.bincount(codes, weights=x, minlength=ngroups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Median ratio from the two middle values of each sorted segment
+        ratio_sorted = ratio[np.lexsort((ratio, codes))]
+        lo = ratio_sorted[starts + (n - 1) // 2]
+        hi = ratio_sorted[starts + n // 2]
+        median_ratio = (lo + hi) / 2
+        row_median = median_ratio[codes]
+
+        # COD
+        abs_diff_sum = group_sum(np.abs(ratio - row_median))
+        cod = 100 / median_ratio * (abs_diff_sum / n)
+
+        # PRD. The sale price weighted mean ratio reduces to the sum of
+        # estimates over the sum of sale prices
+        estimate_sum = group_sum(estimate)
+        sale_price_sum = group_sum(sale_price)
+        prd = (group_sum(ratio) / n) / (estimate_sum / sale_price_sum)
+
+        # PRB, using the closed-form slope of a single regressor model
+        lhs, rhs = _prb_design(estimate, sale_price, row_median)
+        prb, _, _ = _prb_fit(
+            lhs,
+            rhs,
+            lambda x: (group_sum(x) / n)[codes],
+            lambda x, y: group_sum(x * y),
+        )
+
+        # Gini coefficients. lexsort is stable, so ties in sale price keep
+        # their input order, same as _calculate_gini()
+        order = np.lexsort((sale_price, codes))
+        codes_sorted = codes[order]
+        rank = np.arange(1, codes.size + 1) - starts[codes_sorted]
+        assessed_sum = np.bincount(
+            codes_sorted, weights=estimate[order] * rank, minlength=ngroups
+        )
+        sale_price_rank_sum = np.bincount(
+            codes_sorted, weights=sale_price[order] * rank, minlength=ngroups
+        )
+        gini_assessed = _gini_from_sums(assessed_sum, estimate_sum, n)
+        gini_sale_price = _gini_from_sums(
+            sale_price_rank_sum, sale_price_sum, n
+        )
+        mki = gini_assessed / gini_sale_price
+        ki = gini_assessed - gini_sale_price
+
+    return {
+        "n": n,
+        "median_ratio": median_ratio,
+        "cod": cod,
+        "prd": prd,
+        "prb": prb,
+        "mki": mki,
+        "ki": ki,
+    }
+
+
+def ratio_study(
+    df: pd.DataFrame,
+    by: Union[str, list[str]],
+    estimate: str = "estimate",
+    sale_price: str = "sale_price",
+    validate: bool = True,
+) -> pd.DataFrame:
+    """
+    Calculate a full sales ratio study (median ratio, COD, PRD, PRB, MKI and
+    KI) for every group in a DataFrame, such as each township and class.
+
+    This is equivalent to calling each metric function inside a pandas
+    ``groupby().apply()``, but is much faster for large numbers of groups.
+    Inputs are validated once, and the data is partitioned once, after which
+    all metrics are computed for every group using vectorized segment
+    operations.
+
+    :param df:
+        A ``pd.DataFrame`` containing estimates, sale prices and one or more
+        grouping columns.
+    :param by:
+        Name or list of names of the columns to group by.
+    :param estimate:
+        Default ``estimate``. Name of the column containing estimated values.
+    :param sale_price:
+        Default ``sale_price``. Name of the column containing sale prices.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :type df: pd.DataFrame
+    :type by: str or list[str]
+    :type estimate: str
+    :type sale_price: str
+    :type validate: bool
+
+    :return:
+        A tidy ``pd.DataFrame`` with one row per group. Contains the grouping
+        columns, the number of sales ``n``, and one column per metric.
+        Metrics that are undefined for a group (e.g. PRB for a group with a
+        single sale) are ``NaN``.
+    :rtype: pd.DataFrame
+
+    :Example:
+
+    .. code-block:: python
+
+        # Calculate ratio statistics by township:
+        import assesspy as ap
+
+        ap.ratio_study(ap.ccao_sample(), by="township_name")
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    estimate_arr, sale_price_arr = check_inputs(
+        df[estimate], df[sale_price], validate=validate
+    )
+
+    grouped = df.groupby(by, sort=True, observed=True)
+    codes = grouped.ngroup().to_numpy()
+    keys = grouped.size().index
+
+    # Rows with a missing group key are dropped, same as groupby()
+    keep = codes >= 0
+    out = _grouped_metrics(
+        codes[keep],
+        estimate_arr[keep],
+        sale_price_arr[keep],
+        len(keys),
+    )
+
+    return pd.DataFrame(out, index=keys).reset_index()
+
+
+class RatioStudy:
+    """
+    Prepared sales ratio study for a single set of estimates and sale prices.
+
+    Inputs are validated and converted to NumPy arrays once, when the object
+    is created. Intermediate values shared across metrics (the ratio vector,
+    the median ratio, the sale price sort order and the PRB regression
+    variables) are computed lazily and cached, so calculating every metric
+    costs a single sort plus a few linear passes over the data.
+
+    :param estimate:
+        A list or ``pd.Series`` of estimated values.
+        Must be the same length as ``sale_price``.
+    :param sale_price:
+        A list or ``pd.Series`` of sale prices.
+        Must be the same length as ``estimate``.
+    :param validate:
+        Default ``True``. Whether to check inputs for invalid values. Set to
+        ``False`` to skip validation in trusted pipelines where the data has
+        already been checked.
+    :type estimate: Array-like numeric values
+    :type sale_price: Array-like numeric values
+    :type validate: bool
+
+    :Example:
+
+    .. code-block:: python
+
+        # Calculate all ratio statistics for a sample:
+        import assesspy as ap
+
+        sample = ap.ccao_sample()
+        study = ap.RatioStudy(sample.estimate, sample.sale_price)
+        study.cod()
+        study.summary()
+    """
+
+    def __init__(
+        self,
+        estimate: Union[list[int], list[float], pd.Series],
+        sale_price: Union[list[int], list[float], pd.Series],
+        validate: bool = True,
+    ) -> None:
+        self.estimate: np.ndarray
+        self.sale_price: np.ndarray
+        self.estimate, self.sale_price = check_inputs(
+            estimate, sale_price, validate=validate
+        )
+
+    @cached_property
+    def ratio(self) -> np.ndarray:
+        """Sales ratios (estimate / sale price)."""
+        return self.estimate / self.sale_price
+
+    @cached_property
+    def median_ratio(self) -> float:
+        """Median sales ratio."""
+        return float(np.median(self.ratio))
+
+    @cached_property
+    def _sale_price_order(self) -> np.ndarray:
+        # Stable sort so that ties keep their input order
+        return np.argsort(self.sale_price, kind="stable")
+
+    @cached_property
+    def _gini(self) -> tuple[float, float]:
+        order = self._sale_price_order
+        return (
+            _gini_coef(self.estimate[order]),
+            _gini_coef(self.sale_price[order]),
+        )
+
+    @cached_property
+    def _prb_design(self) -> tuple[np.ndarray, np.ndarray]:
+        return _prb_design(self.estimate, self.sale_price, self.median_ratio)
+
+    def cod(self) -> float:
+        """Coefficient of Dispersion. See :func:`assesspy.cod`."""
+        abs_diff_mean = np.abs(self.ratio - self.median_ratio).mean()
+        return float(100 / self.median_ratio * abs_diff_mean)
+
+    def prd(self) -> float:
+        """Price-Related Differential. See :func:`assesspy.prd`."""
+        weighted_mean = self.estimate.sum() / self.sale_price.sum()
+        return float(self.ratio.mean() / weighted_mean)
+
+    def prb(self) -> float:
+        """Price-Related Bias. See :func:`assesspy.prb`."""
+        prb, _, _ = _prb_ols(*self._prb_design)
+        return prb
+
+    def mki(self) -> float:
+        """Modified Kakwani Index. See :func:`assesspy.mki`."""
+        gini_assessed, gini_sale_price = self._gini
+        return float(gini_assessed / gini_sale_price)
+
+    def ki(self) -> float:
+        """Kakwani Index. See :func:`assesspy.ki`."""
+        gini_assessed, gini_sale_price = self._gini
+        return float(gini_assessed - gini_sale_price)
+
+    def summary(self) -> dict[str, float]:
+        """
+        Calculate every ratio statistic.
+
+        :return:
+            A dictionary containing the number of sales ``n``, the median
+            ratio, COD, PRD, PRB, MKI and KI.
+        :rtype: dict[str, float]
+        """
+        return {
+            "n": self.ratio.size,
+            "median_ratio": self.median_ratio,
+            "cod": self.cod(),
+            "prd": self.prd(),
+            "prb": self.prb(),
+            "mki": self.mki(),
+            "ki": self.ki(),
+        }
@@ -1,6 +1,12 @@
+from functools import partial
+
+import numpy as np
+import pandas as pd
 import pytest as pt
+from scipy.stats import binom
 
 import assesspy as ap
+from assesspy import ci, metrics
 
 
 class TestCI:
@@ -52,3 +58,503 @@ class TestCI:
     def test_metric_ci_raises_on_bad_nboot(self, metric, ccao_data, nboot):
         with pt.raises(Exception):
             getattr(ap, f"{metric}_ci")(*ccao_data, nboot=nboot)
+
+    @pt.mark.parametrize("metric", ["cod", "prd"])
+    def test_boot_ci_batched_matches_per_row(self, metric, ccao_data):
+        fun = getattr(ap, metric)
+        np.random.seed(42)
+        batched = ap.boot_ci(fun, *ccao_data, nboot=100)
+        np.random.seed(42)
+        per_row = ap.boot_ci(lambda x, y: fun(x, y), *ccao_data, nboot=100)
+        assert batched == pt.approx(per_row, rel=1e-12)
+
+    @pt.mark.parametrize("metric", ["cod", "mki"])
+    def test_boot_ci_is_identical_across_n_jobs(self, metric, ccao_data):
+        fun = getattr(ap, metric)
+        serial = ap.boot_ci(fun, *ccao_data, nboot=200, random_state=1)
+        parallel = ap.boot_ci(
+            fun, *ccao_data, nboot=200, random_state=1, n_jobs=2
+        )
+        assert serial == parallel
+
+    def test_boot_ci_uses_pool(self, ccao_data, monkeypatch):
+        # A typical neighborhood (n ~ 1,000, nboot = 1,000) spans several
+        # blocks, which are split across workers
+        pools = []
+
+        class RecordingPool(ci.ProcessPoolExecutor):
+            def __init__(self, *args, **kwargs):
+                pools.append(kwargs)
+                super().__init__(*args, **kwargs)
+
+        monkeypatch.setattr(ci, "ProcessPoolExecutor", RecordingPool)
+        parallel = ap.cod_ci(*ccao_data, random_state=1, n_jobs=2)
+        assert len(pools) == 1
+        assert pools[0]["max_workers"] == 2
+        assert pools[0]["initializer"] is ci._init_boot_worker
+        assert parallel == ap.cod_ci(*ccao_data, random_state=1)
+
+    @pt.mark.parametrize(
+        "nboot, n", [(1000, 1000), (10, 1000), (1000, 2**21), (100, 30)]
+    )
+    def test_boot_block_sizes(self, nboot, n):
+        sizes = ci._boot_block_sizes(nboot, n)
+        assert sum(sizes) == nboot
+        assert max(sizes) == 1 or max(sizes) * n <= ci._BOOT_BLOCK_SIZE
+        if nboot * n <= ci._BOOT_BLOCK_SIZE:
+            # Small bootstraps run as a single vectorized block
+            assert sizes == [nboot]
+
+    def test_boot_ci_random_state_is_reproducible(self, ccao_data):
+        first = ap.cod_ci(*ccao_data, nboot=100, random_state=5)
+        second = ap.cod_ci(*ccao_data, nboot=100, random_state=5)
+        other = ap.cod_ci(*ccao_data, nboot=100, random_state=6)
+        assert first == second
+        assert first != other
+
+    @pt.mark.parametrize("metric", ["cod", "prd", "prb", "mki", "ki"])
+    def test_boot_ci_float32_matches_float64(self, metric, ccao_data):
+        fun = getattr(ap, metric)
+        expected = ap.boot_ci(fun, *ccao_data, nboot=100, random_state=3)
+        result = ap.boot_ci(
+            fun, *ccao_data, nboot=100, random_state=3, dtype="float32"
+        )
+        assert result == pt.approx(expected, rel=1e-5, abs=1e-6)
+
+    def test_boot_ci_adaptive_stops_early(self, ccao_data):
+        lower, upper, nboot = ap.cod_ci(
+            *ccao_data, nboot=100, tol=0.2, random_state=1
+        )
+        assert 100 <= nboot < 10000
+        assert nboot % 100 == 0
+        assert lower < ap.cod(*ccao_data) < upper
+
+    def test_boot_ci_adaptive_respects_max_boot(self, ccao_data):
+        result = ap.boot_ci(
+            ap.prd, *ccao_data, nboot=150, tol=1e-6, max_boot=400
+        )
+        assert result[2] == 400
+
+    def test_boot_ci_adaptive_is_reproducible(self, ccao_data):
+        first = ap.cod_ci(*ccao_data, nboot=100, tol=0.1, random_state=2)
+        second = ap.cod_ci(*ccao_data, nboot=100, tol=0.1, random_state=2)
+        assert first == second
+
+    def test_boot_ci_adaptive_matches_fixed(self, ccao_data):
+        lower, upper, _ = ap.cod_ci(
+            *ccao_data, nboot=200, tol=0.05, random_state=3
+        )
+        expected = ap.cod_ci(*ccao_data, nboot=10000, random_state=3)
+        assert (lower, upper) == pt.approx(expected, rel=0.02)
+
+    @pt.mark.parametrize("tol", [0, -0.1])
+    def test_boot_ci_raises_on_bad_tol(self, ccao_data, tol):
+        with pt.raises(ValueError):
+            ap.cod_ci(*ccao_data, tol=tol)
+
+    def test_mc_std_err_shrinks_with_replicates(self):
+        rng = np.random.default_rng(0)
+        small = ci._mc_std_err(rng.normal(size=1000), [0.025, 0.975])
+        large = ci._mc_std_err(rng.normal(size=16000), [0.025, 0.975])
+        # Standard error of a normal 2.5% quantile is about 0.085 / sqrt(B/1000)
+        assert small == pt.approx([0.085, 0.085], rel=0.3)
+        assert (large < small / 2).all()
+
+    @pt.mark.parametrize("metric", ["cod", "prd", "prb", "mki", "ki"])
+    def test_weighted_batch_matches_expanded(self, metric, ccao_data):
+        # The sample has ties in sale price, which must keep their input
+        # order in the expanded sample, same as _calculate_gini()
+        estimate, sale_price = (x.to_numpy()[:50] for x in ccao_data)
+        assert len(np.unique(sale_price)) < 50
+        counts = np.random.multinomial(200, np.full(50, 1 / 50), size=5)
+        order = np.argsort(estimate / sale_price)
+        result = ci._batch_fun(
+            getattr(ap, metric), weighted=True, row_index=order
+        )(estimate[order], sale_price[order], counts[:, order])
+        expected = [
+            getattr(ap, metric)(
+                np.repeat(estimate, c), np.repeat(sale_price, c)
+            )
+            for c in counts
+        ]
+        assert result == pt.approx(expected, rel=1e-12)
+
+    @pt.mark.parametrize("metric", ["cod", "prd"])
+    def test_blb_matches_full_bootstrap(self, metric, ccao_data):
+        # Default gamma and n_subsets
+        fun = getattr(ap, f"{metric}_ci")
+        full = fun(*ccao_data, nboot=2000, random_state=1)
+        blb = fun(*ccao_data, nboot=2000, method="blb", random_state=1)
+        assert blb == pt.approx(full, rel=0.02)
+        assert blb == fun(*ccao_data, nboot=2000, method="blb", random_state=1)
+
+    def test_blb_is_identical_across_n_jobs(self, ccao_data):
+        serial = ap.boot_ci(
+            ["cod", "mki"], *ccao_data, method="blb", random_state=1
+        )
+        parallel = ap.boot_ci(
+            ["cod", "mki"], *ccao_data, method="blb", random_state=1, n_jobs=2
+        )
+        pd.testing.assert_frame_equal(serial, parallel)
+
+    @pt.mark.parametrize(
+        "kwargs",
+        [
+            {"method": "other"},
+            {"method": "blb", "gamma": 0.3},
+            {"method": "blb", "n_subsets": 0},
+            {"method": "blb", "tol": 0.1},
+        ],
+    )
+    def test_blb_raises_on_bad_args(self, ccao_data, kwargs):
+        with pt.raises(ValueError):
+            ap.cod_ci(*ccao_data, **kwargs)
+
+    @pt.mark.parametrize("method", ["blb", "multinomial", "poisson"])
+    def test_boot_ci_raises_on_unsupported_fun(self, ccao_data, method):
+        def mean_ratio(estimate, sale_price):
+            return float((estimate / sale_price).mean())
+
+        with pt.raises(ValueError, match="only supports"):
+            ap.boot_ci(mean_ratio, *ccao_data, method=method)
+
+    @pt.mark.parametrize("method", ["multinomial", "poisson"])
+    @pt.mark.parametrize("metric", ["cod", "prd", "prb", "mki", "ki"])
+    def test_count_bootstrap_matches_full(self, metric, method, ccao_data):
+        fun = getattr(ap, metric)
+        full = ap.boot_ci(fun, *ccao_data, nboot=2000, random_state=1)
+        counts = ap.boot_ci(
+            fun, *ccao_data, nboot=2000, method=method, random_state=2
+        )
+        width = full[1] - full[0]
+        assert counts == pt.approx(full, abs=0.1 * width)
+        assert counts == ap.boot_ci(
+            fun, *ccao_data, nboot=2000, method=method, random_state=2
+        )
+
+    def test_multinomial_counts_sum_to_n(self):
+        rng = np.random.default_rng(0)
+        counts = ci._boot_counts(rng, 7, 1000, "multinomial")
+        assert counts.shape == (1000, 7)
+        assert (counts.sum(axis=1) == 7).all()
+        assert counts.mean() == pt.approx(1, rel=0.05)
+
+    def test_poisson_bootstrap_drops_empty_replicates(self):
+        seed = np.random.SeedSequence(0)
+        x = np.array([1.0, 2.0, 3.0])
+        ests = ci._boot_block(ap.prd, x, x, 1000, seed, "poisson")
+        # About exp(-3) of the replicates are empty
+        assert 900 < ests.size < 1000
+        assert np.isfinite(ests).all()
+
+    def test_count_bootstrap_supports_tol(self, ccao_data):
+        lower, upper, nboot_used = ap.cod_ci(
+            *ccao_data,
+            nboot=500,
+            tol=0.2,
+            method="multinomial",
+            random_state=1,
+        )
+        assert lower < ap.cod(*ccao_data) < upper
+        assert nboot_used % 500 == 0
+
+
+class TestMedianRatioCI:
+    @pt.mark.parametrize("n", [6, 7, 10, 31, 100, 1001])
+    @pt.mark.parametrize("alpha", [0.05, 0.10, 0.01])
+    def test_median_ratio_ci_matches_binomial_ranks(self, n, alpha):
+        ratio = np.random.permutation(np.arange(1.0, n + 1))
+        # Largest number of ratios k below the interval such that both
+        # tails hold at most alpha / 2, found by exhaustive search
+        tails = binom.cdf(np.arange(n), n, 0.5)
+        valid = np.flatnonzero(tails <= alpha / 2)
+        if valid.size == 0:
+            with pt.warns(UserWarning, match="too small"):
+                assert ap.median_ratio_ci(ratio, np.ones(n), alpha) == (
+                    1.0,
+                    n,
+                )
+            return
+        k = valid[-1]
+        lower, upper = ap.median_ratio_ci(ratio, np.ones(n), alpha)
+        assert (lower, upper) == (k + 1, n - k)
+        assert 1 - 2 * tails[k] >= 1 - alpha
+
+    def test_median_ratio_ci_matches_bootstrap(self, ccao_data):
+        lower, upper = ap.median_ratio_ci(*ccao_data)
+        assert lower < ap.median_ratio(*ccao_data) < upper
+        boot = ap.boot_ci(ap.median_ratio, *ccao_data, nboot=2000)
+        assert (lower, upper) == pt.approx(boot, abs=0.005)
+
+    def test_median_ratio_ci_raises_on_bad_input(self, bad_input):
+        with pt.raises(Exception):
+            ap.median_ratio_ci(*bad_input)
+
+    @pt.mark.parametrize("method", ["full", "multinomial", "blb"])
+    def test_boot_ci_supports_median_ratio(self, ccao_data, method):
+        result = ap.boot_ci(
+            ap.median_ratio, *ccao_data, method=method, random_state=1
+        )
+        expected = ap.boot_ci(
+            ["median_ratio"], *ccao_data, method=method, random_state=1
+        )
+        assert result == pt.approx(
+            tuple(expected.loc[0, ["ci_lower", "ci_upper"]]), rel=1e-12
+        )
+
+
+class TestMultiMetricBootCI:
+    def test_boot_ci_all_returns_tidy_frame(self, ccao_data):
+        out = ap.boot_ci("all", *ccao_data, nboot=200, random_state=1)
+        assert list(out.columns) == [
+            "metric",
+            "estimate",
+            "ci_lower",
+            "ci_upper",
+        ]
+        assert list(out["metric"]) == list(ci._ALL_METRICS)
+        assert (out["ci_lower"] < out["estimate"]).all()
+        assert (out["estimate"] < out["ci_upper"]).all()
+        for metric in ["cod", "prd", "prb", "mki", "ki"]:
+            row = out.set_index("metric").loc[metric]
+            assert row["estimate"] == pt.approx(
+                getattr(ap, metric)(*ccao_data), rel=1e-12
+            )
+
+    @pt.mark.parametrize("method", ["full", "multinomial", "poisson"])
+    def test_boot_ci_list_shares_resamples(self, ccao_data, method):
+        # The same seed yields the same resamples, so each metric's interval
+        # matches the interval from bootstrapping it alone
+        out = ap.boot_ci(
+            [ap.cod, "prb", ap.mki],
+            *ccao_data,
+            nboot=200,
+            method=method,
+            random_state=1,
+        ).set_index("metric")
+        for metric in ["cod", "prb", "mki"]:
+            expected = ap.boot_ci(
+                getattr(ap, metric),
+                *ccao_data,
+                nboot=200,
+                method=method,
+                random_state=1,
+            )
+            result = tuple(out.loc[metric, ["ci_lower", "ci_upper"]])
+            assert result == pt.approx(expected, rel=1e-12)
+
+    def test_boot_ci_list_supports_blb_and_tol(self, ccao_data):
+        blb = ap.boot_ci(
+            ["cod", "prd"], *ccao_data, method="blb", random_state=1
+        )
+        assert blb["ci_lower"].tolist() == pt.approx(
+            [ap.cod_ci(*ccao_data, method="blb", random_state=1)[0]]
+            + [ap.prd_ci(*ccao_data, method="blb", random_state=1)[0]],
+            rel=1e-12,
+        )
+        adaptive = ap.boot_ci(
+            ["cod", "prd"], *ccao_data, nboot=200, tol=0.5, random_state=1
+        )
+        assert "nboot" in adaptive.columns
+        assert (adaptive["nboot"] % 200 == 0).all()
+
+    def test_boot_ci_list_drops_duplicates(self, ccao_data):
+        out = ap.boot_ci([ap.cod, "cod"], *ccao_data, nboot=10)
+        assert out["metric"].tolist() == ["cod"]
+
+    @pt.mark.parametrize("fun", ["cod", "other", [], ["cod", "other"]])
+    def test_boot_ci_raises_on_bad_metrics(self, ccao_data, fun):
+        with pt.raises(ValueError):
+            ap.boot_ci(fun, *ccao_data, nboot=10)
+
+    def test_metrics_batch_matches_single_metrics(self, ccao_data):
+        estimate, sale_price = (x.to_numpy() for x in ccao_data)
+        idx = np.random.randint(0, estimate.size, size=(5, estimate.size))
+        result = metrics._metrics_batch(
+            estimate[idx], sale_price[idx], ci._ALL_METRICS
+        )
+        assert result.shape == (5, len(ci._ALL_METRICS))
+        assert result[:, 0] == pt.approx(
+            np.median(estimate[idx] / sale_price[idx], axis=1), rel=1e-12
+        )
+        for j, fun in enumerate([ap.cod, ap.prd, ap.prb, ap.mki, ap.ki], 1):
+            expected = [fun(estimate[i], sale_price[i]) for i in idx]
+            assert result[:, j] == pt.approx(expected, rel=1e-9)
+
+    def test_metrics_weighted_batch_matches_single_metrics(self, ccao_data):
+        estimate, sale_price = (x.to_numpy() for x in ccao_data)
+        order = np.argsort(estimate / sale_price)
+        estimate, sale_price = estimate[order], sale_price[order]
+        counts = np.random.poisson(1.0, size=(5, estimate.size))
+        result = metrics._metrics_weighted_batch(
+            estimate, sale_price, counts, ci._ALL_METRICS
+        )
+        for j, fun in enumerate([ap.cod, ap.prd, ap.prb, ap.mki, ap.ki], 1):
+            expected = [
+                fun(np.repeat(estimate, c), np.repeat(sale_price, c))
+                for c in counts
+            ]
+            assert result[:, j] == pt.approx(expected, rel=1e-9)
+
+
+class TestGroupedBootCI:
+    @pt.fixture
+    def ccao_df(self):
+        return ap.ccao_sample()
+
+    def test_grouped_kernel_matches_expanded(self, ccao_df):
+        df = ccao_df.iloc[:300]
+        codes = pd.factorize(df["township_name"])[0]
+        order = np.lexsort((df.estimate / df.sale_price, codes))
+        estimate = df.estimate.to_numpy()[order]
+        sale_price = df.sale_price.to_numpy()[order]
+        sizes = np.bincount(codes)
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        rng = np.random.default_rng(0)
+        counts = ci._stratified_counts(rng, starts, sizes, 4)
+        result = metrics._grouped_metrics_weighted_batch(
+            estimate,
+            sale_price,
+            counts,
+            starts,
+            sizes,
+            ci._ALL_METRICS,
+            row_index=order,
+        )
+        assert result.shape == (4, sizes.size, len(ci._ALL_METRICS))
+        for g, (start, size) in enumerate(zip(starts, sizes)):
+            rows = slice(start, start + size)
+            assert (counts[:, rows].sum(axis=1) == size).all()
+            # Expand each group in input order, so that ties in sale price
+            # keep their input order
+            input_order = np.argsort(order[rows])
+            for b in range(4):
+                c = counts[b, rows][input_order]
+                est = np.repeat(estimate[rows][input_order], c)
+                sp = np.repeat(sale_price[rows][input_order], c)
+                expected = [np.median(est / sp)] + [
+                    getattr(ap, m)(est, sp) for m in ci._ALL_METRICS[1:]
+                ]
+                assert result[b, g] == pt.approx(expected, rel=1e-9)
+
+    def test_grouped_boot_ci_matches_per_group(self, ccao_df):
+        out = ap.boot_ci(
+            ap.cod,
+            ccao_df.estimate,
+            ccao_df.sale_price,
+            by=ccao_df.township_name,
+            nboot=2000,
+            random_state=1,
+        )
+        assert list(out.columns) == [
+            "township_name",
+            "n",
+            "metric",
+            "estimate",
+            "ci_lower",
+            "ci_upper",
+        ]
+        for _, row in out.iterrows():
+            group = ccao_df[ccao_df.township_name == row["township_name"]]
+            assert row["n"] == len(group)
+            assert row["estimate"] == pt.approx(
+                ap.cod(group.estimate, group.sale_price), rel=1e-12
+            )
+            lower, upper = ap.cod_ci(
+                group.estimate, group.sale_price, nboot=2000, random_state=2
+            )
+            width = upper - lower
+            assert row["ci_lower"] == pt.approx(lower, abs=0.1 * width)
+            assert row["ci_upper"] == pt.approx(upper, abs=0.1 * width)
+
+    def test_grouped_boot_ci_all_metrics_and_keys(self, ccao_df):
+        by = ccao_df[["township_name"]].assign(
+            high_price=ccao_df.sale_price > ccao_df.sale_price.median()
+        )
+        out = ap.boot_ci(
+            "all",
+            ccao_df.estimate,
+            ccao_df.sale_price,
+            by=by,
+            nboot=100,
+            random_state=1,
+        )
+        ngroups = len(by.drop_duplicates())
+        assert len(out) == ngroups * len(ci._ALL_METRICS)
+        assert list(out.columns[:2]) == ["township_name", "high_price"]
+        pd.testing.assert_frame_equal(
+            out,
+            ap.boot_ci(
+                "all",
+                ccao_df.estimate,
+                ccao_df.sale_price,
+                by=by,
+                nboot=100,
+                random_state=1,
+                n_jobs=2,
+            ),
+        )
+
+    def test_grouped_boot_ci_custom_fun(self, ccao_df):
+        def mean_ratio(estimate, sale_price):
+            return float((estimate / sale_price).mean())
+
+        out = ap.boot_ci(
+            mean_ratio,
+            ccao_df.estimate,
+            ccao_df.sale_price,
+            by=ccao_df.township_name,
+            nboot=200,
+            random_state=1,
+        )
+        assert out["metric"].unique().tolist() == ["mean_ratio"]
+        assert (out["ci_lower"] < out["estimate"]).all()
+        assert (out["estimate"] < out["ci_upper"]).all()
+
+    def test_grouped_boot_ci_custom_fun_uses_one_pool(
+        self, ccao_df, monkeypatch
+    ):
+        # Groups are sent to a single pool, instead of one pool per group
+        pools = []
+
+        class RecordingPool(ci.ProcessPoolExecutor):
+            def __init__(self, *args, **kwargs):
+                pools.append(kwargs)
+                super().__init__(*args, **kwargs)
+
+        monkeypatch.setattr(ci, "ProcessPoolExecutor", RecordingPool)
+        # Not a built-in metric, so each group is bootstrapped separately
+        fun = partial(ap.cod, validate=False)
+        args = (ccao_df.estimate, ccao_df.sale_price)
+        kwargs = {"by": ccao_df.township_name, "nboot": 100, "random_state": 1}
+        parallel = ap.boot_ci(fun, *args, n_jobs=2, **kwargs)
+        assert len(pools) == 1
+        assert pools[0]["initializer"] is ci._init_group_worker
+        pd.testing.assert_frame_equal(
+            parallel, ap.boot_ci(fun, *args, **kwargs)
+        )
+
+    def test_grouped_boot_ci_single_sale_group(self):
+        out = ap.boot_ci(
+            ["median_ratio", "prb"],
+            [1.0, 2.0, 3.0, 5.0],
+            [1.0, 2.5, 2.0, 4.0],
+            by=["a", "a", "a", "b"],
+            nboot=50,
+        )
+        single = out[out["group"] == "b"]
+        assert single["ci_lower"].iloc[0] == 1.25
+        assert np.isnan(single["ci_lower"].iloc[1])
+
+    @pt.mark.parametrize(
+        "kwargs", [{"method": "blb"}, {"method": "poisson"}, {"tol": 0.1}]
+    )
+    def test_grouped_boot_ci_raises_on_bad_args(self, ccao_df, kwargs):
+        with pt.raises(ValueError):
+            ap.boot_ci(
+                ap.cod,
+                ccao_df.estimate,
+                ccao_df.sale_price,
+                by=ccao_df.township_name,
+                **kwargs,
+            )
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+import pytest as pt
+
+import assesspy as ap
+
+
+class TestInit:
+    def test_import_does_not_load_heavy_dependencies(self):
+        script = (
+            "import sys, assesspy; "
+            "print([m for m in ('pandas', 'scipy', 'statsmodels') "
+            "if m in sys.modules])"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", script],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        assert out.stdout.strip() == "[]"
+
+    @pt.mark.parametrize("name", ap.__all__)
+    def test_public_names_resolve(self, name):
+        assert callable(getattr(ap, name))
+        assert name in dir(ap)
+
+    def test_unknown_name_raises_attribute_error(self):
+        with pt.raises(AttributeError):
+            ap.not_a_function
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest as pt
+
+import assesspy as ap
+from assesspy import jackknife
+
+METRICS = ["median_ratio", "cod", "prd", "prb", "mki", "ki"]
+
+
+def brute_force_loo(estimate, sale_price, metric):
+    return np.array(
+        [
+            getattr(ap, metric)(
+                np.delete(estimate, i), np.delete(sale_price, i)
+            )
+            for i in range(estimate.size)
+        ]
+    )
+
+
+class TestInfluence:
+    @pt.fixture(params=METRICS)
+    def metric(self, request):
+        return request.param
+
+    @pt.mark.parametrize("n", [4, 5, 30])
+    def test_loo_matches_brute_force(self, metric, quintos_data, n):
+        estimate, sale_price = (x.to_numpy()[:n] for x in quintos_data)
+        (result,) = jackknife._loo_metrics(estimate, sale_price, (metric,)).T
+        expected = brute_force_loo(estimate, sale_price, metric)
+        assert result == pt.approx(expected, rel=1e-12, abs=1e-12)
+
+    def test_loo_matches_brute_force_with_ties(self, metric):
+        # Tied ratios and sale prices exercise the median and Gini paths
+        estimate = np.array([1.0, 2.0, 2.0, 3.0, 6.0, 4.0, 4.0, 9.0])
+        sale_price = np.array([1.0, 2.0, 2.0, 3.0, 3.0, 4.0, 4.0, 5.0])
+        (result,) = jackknife._loo_metrics(estimate, sale_price, (metric,)).T
+        expected = brute_force_loo(estimate, sale_price, metric)
+        assert result == pt.approx(expected, rel=1e-12, abs=1e-12)
+
+    def test_influence_is_change_from_full_sample(self, ccao_data):
+        result = ap.influence(*ccao_data)
+        assert list(result.columns) == METRICS
+        assert result.index.equals(ccao_data[0].index)
+        estimate, sale_price = (x.to_numpy() for x in ccao_data)
+        for i in [0, 17, 500]:
+            keep = np.arange(estimate.size) != i
+            expected = ap.cod(estimate[keep], sale_price[keep]) - ap.cod(
+                estimate, sale_price
+            )
+            assert result["cod"].iloc[i] == pt.approx(expected, abs=1e-12)
+
+    def test_influence_accepts_functions_and_names(self, ccao_data):
+        result = ap.influence(*ccao_data, metrics=[ap.prb, "cod", ap.cod])
+        assert list(result.columns) == ["prb", "cod"]
+        single = ap.influence(*ccao_data, metrics=ap.mki)
+        pd.testing.assert_series_equal(
+            single["mki"], ap.influence(*ccao_data)["mki"]
+        )
+
+    @pt.mark.parametrize("metrics", ["other", [], ["cod", np.mean]])
+    def test_influence_raises_on_bad_metrics(self, ccao_data, metrics):
+        with pt.raises(ValueError):
+            ap.influence(*ccao_data, metrics=metrics)
+
+    def test_influence_raises_on_bad_input(self, bad_input):
+        with pt.raises(Exception):
+            ap.influence(*bad_input)
+
+
+class TestJackknifeCI:
+    def test_jackknife_ci_matches_formula(self, quintos_data):
+        estimate, sale_price = (x.to_numpy() for x in quintos_data)
+        loo = brute_force_loo(estimate, sale_price, "cod")
+        n = estimate.size
+        std_err = np.sqrt((n - 1) / n * ((loo - loo.mean()) ** 2).sum())
+        full = ap.cod(estimate, sale_price)
+        margin = 2.045229642132703 * std_err  # t quantile with 29 df
+        lower, upper = ap.jackknife_ci(ap.cod, estimate, sale_price)
+        assert lower == pt.approx(full - margin, rel=1e-9)
+        assert upper == pt.approx(full + margin, rel=1e-9)
+        assert (lower, upper) == ap.jackknife_ci("cod", estimate, sale_price)
+
+    def test_jackknife_ci_close_to_bootstrap(self, ccao_data):
+        out = ap.jackknife_ci("all", *ccao_data).set_index("metric")
+        assert list(out.columns) == [
+            "estimate",
+            "std_err",
+            "ci_lower",
+            "ci_upper",
+        ]
+        for metric in ["cod", "prd", "prb"]:
+            lower, upper = ap.boot_ci(
+                getattr(ap, metric), *ccao_data, nboot=2000
+            )
+            width = upper - lower
+            assert out.loc[metric, "ci_lower"] == pt.approx(
+                lower, abs=0.15 * width
+            )
+            assert out.loc[metric, "ci_upper"] == pt.approx(
+                upper, abs=0.15 * width
+            )
@@ -1,6 +1,10 @@
+import sys
+
+import numpy as np
 import pytest as pt
 
 import assesspy as ap
+from assesspy import metrics
 
 
 class TestMetrics:
@@ -79,3 +83,125 @@ class TestMetrics:
             "mki": False,
         }
         assert getattr(ap, f"{metric}_met")(metric_val) == expected[metric]
+
+    def test_metric_batch_matches_scalar(self, metric, ccao_data):
+        estimate, sale_price = (x.to_numpy() for x in ccao_data)
+        idx = np.random.randint(0, estimate.size, size=(5, estimate.size))
+        result = metrics._metrics_batch(
+            estimate[idx], sale_price[idx], (metric,)
+        )[:, 0]
+        expected = [
+            getattr(ap, metric)(estimate[i], sale_price[i]) for i in idx
+        ]
+        assert result.shape == (5,)
+        assert result == pt.approx(expected, rel=1e-9)
+
+    def test_gini_matches_quintos_exactly(self, quintos_data):
+        # Outputs of the original element-by-element implementation
+        gini_assessed, gini_sale_price = metrics._calculate_gini(*quintos_data)
+        assert gini_assessed == 0.22895798693014485
+        assert gini_sale_price == 0.288506087894622
+        assert ap.mki(*quintos_data) == 0.7935984595714065
+        assert ap.ki(*quintos_data) == -0.05954810096447716
+
+    @pt.mark.parametrize("alpha", [0.05, 0.10])
+    def test_prb_closed_form_matches_statsmodels(self, ccao_data, alpha):
+        model = ap.prb_model(*ccao_data)
+        prb, std_err, df_resid = metrics._calculate_prb(*ccao_data)
+        ci_l, ci_u = ap.prb_ci(*ccao_data, alpha=alpha)
+        expected_ci = model.conf_int(alpha=alpha)[1]
+        assert prb == pt.approx(model.params[1], rel=1e-12)
+        assert std_err == pt.approx(model.bse[1], rel=1e-12)
+        assert df_resid == model.df_resid
+        assert ci_l == pt.approx(expected_ci[0], rel=1e-12)
+        assert ci_u == pt.approx(expected_ci[1], rel=1e-12)
+
+    def test_metric_skips_validation(self, metric, good_input):
+        result = getattr(ap, metric)(*good_input, validate=False)
+        assert result == getattr(ap, metric)(*good_input)
+
+    def test_metric_accepts_readonly_arrays(self, metric, ccao_data):
+        # Zero-copy inputs (e.g. memmaps opened read-only or Arrow buffers)
+        # must never be modified in place
+        estimate, sale_price = (np.array(x) for x in ccao_data)
+        estimate.flags.writeable = False
+        sale_price.flags.writeable = False
+        result = getattr(ap, metric)(estimate, sale_price)
+        assert result == pt.approx(getattr(ap, metric)(*ccao_data))
+
+    def test_metric_float32_matches_float64(self, metric, ccao_data):
+        estimate, sale_price = (
+            x.to_numpy(dtype=np.float32) for x in ccao_data
+        )
+        result = getattr(ap, metric)(estimate, sale_price, dtype="float32")
+        expected = getattr(ap, metric)(*ccao_data)
+        assert isinstance(result, float)
+        assert result == pt.approx(expected, rel=1e-6, abs=1e-6)
+
+    def test_metric_batch_float32_matches_float64(self, metric, ccao_data):
+        estimate, sale_price = (x.to_numpy() for x in ccao_data)
+        idx = np.random.randint(0, estimate.size, size=(5, estimate.size))
+        result = metrics._metrics_batch(
+            estimate[idx].astype(np.float32),
+            sale_price[idx].astype(np.float32),
+            (metric,),
+        )[:, 0]
+        expected = metrics._metrics_batch(
+            estimate[idx], sale_price[idx], (metric,)
+        )[:, 0]
+        assert result.dtype == np.float64
+        assert result == pt.approx(expected, rel=1e-6, abs=1e-6)
+
+    def test_metric_raises_on_bad_dtype(self, metric, good_input):
+        with pt.raises(ValueError):
+            getattr(ap, metric)(*good_input, dtype="int64")
+
+
+class TestMedianRatio:
+    def test_median_ratio_value_is_correct(self, ccao_data):
+        result = ap.median_ratio(*ccao_data)
+        assert type(result) is float
+        assert result == pt.approx(0.98294545454, rel=1e-9)
+        assert ap.med_ratio_met(result)
+
+    def test_median_ratio_raises_on_bad_input(self, bad_input):
+        with pt.raises(Exception):
+            ap.median_ratio(*bad_input)
+
+    def test_median_ratio_batch_matches_scalar(self, ccao_data):
+        estimate, sale_price = (x.to_numpy() for x in ccao_data)
+        idx = np.random.randint(0, estimate.size, size=(5, estimate.size))
+        result = metrics._metrics_batch(
+            estimate[idx], sale_price[idx], ("median_ratio",)
+        )[:, 0]
+        expected = [ap.median_ratio(estimate[i], sale_price[i]) for i in idx]
+        assert result == pt.approx(expected, rel=1e-12)
+
+    def test_median_ratio_float32_matches_float64(self, ccao_data):
+        estimate, sale_price = (
+            x.to_numpy(dtype=np.float32) for x in ccao_data
+        )
+        result = ap.median_ratio(estimate, sale_price, dtype="float32")
+        assert result == pt.approx(ap.median_ratio(*ccao_data), rel=1e-6)
+
+
+def test_rank_dot_float32_blocks(monkeypatch):
+    # Accumulating across several blocks must match a single float64 pass
+    monkeypatch.setattr(metrics, "_ACC_BLOCK_SIZE", 7)
+    x = np.random.default_rng(0).random((3, 100))
+    expected = x.astype(np.float32).astype(float) @ np.arange(1, 101)
+    result = metrics._rank_dot(x.astype(np.float32))
+    assert result == pt.approx(expected, rel=1e-12)
+    assert metrics._rank_dot(x[0].astype(np.float32)) == pt.approx(
+        expected[0], rel=1e-12
+    )
+
+
+def test_prb_model_requires_statsmodels(monkeypatch, ccao_data):
+    # statsmodels is an optional dependency, only needed for diagnostics
+    monkeypatch.setitem(sys.modules, "statsmodels.api", None)
+    with pt.raises(ImportError, match="assesspy\\[diagnostics\\]"):
+        ap.prb_model(*ccao_data)
+    # prb() and prb_ci() use the closed form and still work without it
+    assert isinstance(ap.prb(*ccao_data), float)
+    assert len(ap.prb_ci(*ccao_data)) == 2
@@ -5,6 +5,7 @@ import pandas as pd
 import pytest as pt
 
 import assesspy as ap
+from assesspy import outliers
 
 
 class TestOutliers:
@@ -91,3 +92,95 @@ class TestOutliers:
     def test_is_outlier_warns_on_small_sample(self):
         with pt.warns(UserWarning):
             ap.is_outlier(np.random.normal(size=20).tolist(), "quantile")
+
+    def test_is_outlier_float32_matches_float64(self, distribution, method):
+        dist_name, dist_data = distribution
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            expected = ap.is_outlier(dist_data, method)
+            result = ap.is_outlier(dist_data, method, dtype="float32")
+        assert result.equals(expected)
+
+    @pt.mark.parametrize("n", [2, 3, 10, 101, 1000])
+    @pt.mark.parametrize("dtype", [np.float32, np.float64])
+    def test_quantiles_match_numpy(self, n, dtype):
+        x = np.random.default_rng(n).lognormal(size=n).astype(dtype)
+        probs = [0, 0.05, 0.25, 0.5, 0.75, 0.95, 1]
+        result = outliers._quantiles(x, probs)
+        # NumPy < 2 interpolates float32 input in float32
+        rtol = 1e-6 if dtype == np.float32 else 0
+        np.testing.assert_allclose(result, np.quantile(x, probs), rtol=rtol)
+
+    def test_is_outlier_partitions_once(self, monkeypatch, ccao_data):
+        calls = []
+        partition = np.partition
+
+        def counting_partition(*args, **kwargs):
+            calls.append(1)
+            return partition(*args, **kwargs)
+
+        monkeypatch.setattr(outliers.np, "partition", counting_partition)
+        ap.is_outlier(ccao_data[0] / ccao_data[1])
+        assert len(calls) == 1
+
+
+class TestGroupedOutliers:
+    @pt.fixture
+    def grouped_data(self):
+        sample = ap.ccao_sample()
+        ratio = sample.estimate / sample.sale_price
+        groups = pd.DataFrame(
+            {
+                "township": sample.township_name,
+                "class": np.random.choice(["a", "b", "c"], len(sample)),
+            }
+        )
+        # Add a small group and a group with a narrow distribution
+        groups.loc[:9, "township"] = "Small"
+        ratio[20:90] = 1.0
+        groups.loc[20:99, "township"] = "Narrow"
+        return ratio, groups
+
+    @pt.mark.parametrize("method", ["iqr", "quantile"])
+    def test_grouped_matches_per_group(self, grouped_data, method):
+        ratio, groups = grouped_data
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            result = ap.is_outlier(ratio, method, by=groups)
+            expected = ratio.groupby(
+                [groups.township, groups["class"]]
+            ).transform(lambda x: ap.is_outlier(x, method, validate=False))
+        assert result.index.equals(ratio.index)
+        assert result.equals(expected.astype(bool))
+
+    def test_grouped_warns_once(self, grouped_data):
+        ratio, groups = grouped_data
+        with warnings.catch_warnings(record=True) as record:
+            warnings.simplefilter("always")
+            ap.is_outlier(ratio, by=groups)
+        assert len(record) == 1
+        assert issubclass(record[0].category, ap.OutlierWarning)
+        summary = record[0].message.summary
+        assert list(summary.columns) == [
+            "township",
+            "class",
+            "n",
+            "n_outliers",
+            "n_narrow",
+            "small_sample",
+        ]
+        assert "Narrow" in summary.township.tolist()
+        assert (summary.n_narrow > 0).any()
+
+    def test_grouped_accepts_array_keys(self, grouped_data):
+        ratio, groups = grouped_data
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            result = ap.is_outlier(ratio, by=groups.township.to_numpy())
+            expected = ap.is_outlier(ratio, by=groups.township.tolist())
+        assert result.equals(expected)
+
+    def test_grouped_raises_on_length_mismatch(self, grouped_data):
+        ratio, groups = grouped_data
+        with pt.raises(Exception, match="same length"):
+            ap.is_outlier(ratio, by=groups.township[:10])
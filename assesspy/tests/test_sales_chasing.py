@@ -3,6 +3,7 @@ import pandas as pd
 import pytest as pt
 
 import assesspy as ap
+from assesspy import sales_chasing
 
 
 class TestSalesChasing:
@@ -92,3 +93,102 @@ class TestSalesChasing:
     def test_is_sales_chased_raises_on_invalid_gap(self, gap):
         with pt.raises(Exception):
             ap.is_sales_chased(np.random.normal(size=40).tolist(), gap=gap)
+
+    def test_is_sales_chased_exact_has_expected_output(
+        self, distribution_name, distribution, method
+    ):
+        expected = {
+            "normal": {"cdf": False, "dist": False, "both": False},
+            "chased": {"cdf": True, "dist": True, "both": True},
+            "sample": {"cdf": False, "dist": True, "both": False},
+        }
+        assert (
+            ap.is_sales_chased(distribution, method, exact=True)
+            == expected[distribution_name][method]
+        )
+
+    def test_normal_pct_in_range_matches_simulation(self):
+        mean, std = np.array([1.0, 0.9, 1.2]), np.array([0.1, 0.05, 0.3])
+        exact = sales_chasing._normal_pct_in_range(mean, std, (0.98, 1.02))
+        draws = np.random.normal(mean, std, size=(200000, 3))
+        simulated = ((draws >= 0.98) & (draws <= 1.02)).mean(axis=0)
+        assert exact == pt.approx(simulated, abs=0.005)
+
+    def test_dist_sales_chased_batch_matches_scalar(self, sample_dist):
+        groups = np.array_split(sample_dist.to_numpy(), 4) + [
+            np.append(np.random.normal(1, 0.15, 900), [1] * 100)
+        ]
+        pct_actual = [np.mean((g >= 0.98) & (g <= 1.02)) for g in groups]
+        result = sales_chasing._dist_sales_chased_batch(
+            np.array([g.mean() for g in groups]),
+            np.array([g.std() for g in groups]),
+            np.array(pct_actual),
+        )
+        expected = [
+            sales_chasing._dist_sales_chased(g, exact=True) for g in groups
+        ]
+        assert result.tolist() == expected
+
+    @pt.mark.parametrize(
+        "x, expected",
+        [
+            # Largest gap (the three 1.0 values) is within the bounds
+            ([0.5, 0.9, 1.0, 1.0, 1.0, 1.1, 1.2, 1.3], True),
+            # Largest gap is outside the bounds
+            ([0.5, 0.9, 1.2, 1.2, 1.2, 1.1, 1.0, 1.3], False),
+            # The first value has no gap before it
+            ([0.99, 0.99, 0.99, 1.1, 1.2, 1.3, 1.4, 1.5], False),
+            # Ties for the largest gap resolve to the smallest value
+            ([0.5, 1.0, 1.0, 1.2, 1.2, 1.3, 1.4, 1.5], True),
+            ([0.5, 0.9, 0.9, 1.0, 1.0, 1.3, 1.4, 1.5], False),
+            # No gap at all
+            ([1.0, 1.0, 1.0, 1.0], False),
+        ],
+    )
+    def test_cdf_sales_chased_gap_location(self, x, expected):
+        x = np.array(x)
+        assert sales_chasing._cdf_sales_chased(x, gap=0.2) == expected
+
+
+class TestGroupedSalesChasing:
+    @pt.fixture
+    def grouped_data(self, ccao_data):
+        estimate, sale_price = ccao_data
+        ratio = (estimate / sale_price).to_numpy().copy()
+        groups = np.random.choice(["a", "b", "c", "d"], ratio.size)
+        ratio[np.flatnonzero(groups == "b")[:60]] = 1.0
+        return ratio, groups
+
+    @pt.mark.parametrize("method", ["cdf", "dist", "both"])
+    def test_grouped_matches_per_group(self, grouped_data, method):
+        ratio, groups = grouped_data
+        result = ap.is_sales_chased(ratio, method, by=groups)
+        expected = [
+            ap.is_sales_chased(ratio[groups == g], method, exact=True)
+            for g in ["a", "b", "c", "d"]
+        ]
+        assert result["group"].tolist() == ["a", "b", "c", "d"]
+        assert result["n"].sum() == ratio.size
+        assert result["is_sales_chased"].tolist() == expected
+        assert result.loc[1, "is_sales_chased"]
+
+    def test_grouped_has_method_columns(self, grouped_data):
+        ratio, groups = grouped_data
+        by = pd.DataFrame({"township": groups, "class": groups == "a"})
+        result = ap.is_sales_chased(ratio, by=by)
+        assert list(result.columns) == [
+            "township",
+            "class",
+            "n",
+            "cdf",
+            "dist",
+            "is_sales_chased",
+        ]
+        assert (result.is_sales_chased == (result.cdf & result.dist)).all()
+
+    def test_grouped_warns_once_on_small_groups(self, grouped_data):
+        ratio, _ = grouped_data
+        groups = np.arange(ratio.size) % 100
+        with pt.warns(UserWarning, match="100 groups") as record:
+            ap.is_sales_chased(ratio, by=groups)
+        assert len(record) == 1
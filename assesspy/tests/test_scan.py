@@ -0,0 +1,77 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pytest as pt
+
+import assesspy as ap
+
+
+@pt.fixture(scope="module")
+def sample():
+    return ap.ccao_sample()
+
+
+@pt.fixture(scope="module")
+def dataset_path(sample, tmp_path_factory):
+    # Partitioned dataset with small row groups and an unused column, to
+    # exercise projection, partition keys and multiple batches
+    path = tmp_path_factory.mktemp("sales")
+    table = pa.Table.from_pandas(
+        sample.assign(unused=1.0).reset_index(), preserve_index=False
+    )
+    ds.write_dataset(
+        table,
+        path,
+        format="parquet",
+        partitioning=["township_name"],
+        partitioning_flavor="hive",
+        max_rows_per_group=64,
+        min_rows_per_group=64,
+    )
+    return str(path)
+
+
+class TestScanParquet:
+    def test_scan_matches_metrics(self, sample, dataset_path):
+        out = ap.scan_parquet(dataset_path)
+        assert list(out.columns) == ["n", "median_ratio", "cod", "prd", "prb"]
+        assert out["n"][0] == len(sample)
+        assert out["cod"][0] == pt.approx(
+            ap.cod(sample.estimate, sample.sale_price)
+        )
+        assert out["prd"][0] == pt.approx(
+            ap.prd(sample.estimate, sample.sale_price)
+        )
+        assert out["prb"][0] == pt.approx(
+            ap.prb(sample.estimate, sample.sale_price)
+        )
+
+    def test_scan_by_matches_ratio_study(self, sample, dataset_path):
+        out = ap.scan_parquet(dataset_path, by="township_name")
+        expected = ap.ratio_study(sample, by="township_name")
+        assert list(out.columns) == list(expected.columns)
+        assert out["township_name"].tolist() == (
+            expected["township_name"].tolist()
+        )
+        for col in ["n", "median_ratio", "cod", "prd", "prb", "mki", "ki"]:
+            assert out[col].to_numpy() == pt.approx(expected[col].to_numpy())
+
+    def test_scan_filter(self, sample, dataset_path):
+        out = ap.scan_parquet(
+            dataset_path, filter=pc.field("township_name") == "Evanston"
+        )
+        subset = sample[sample.township_name == "Evanston"]
+        assert out["n"][0] == len(subset)
+        assert out["cod"][0] == pt.approx(
+            ap.cod(subset.estimate, subset.sale_price)
+        )
+
+    def test_scan_single_file(self, sample, tmp_path):
+        path = tmp_path / "sample.parquet"
+        sample.to_parquet(path)
+        out = ap.scan_parquet(str(path), by=["township_name"])
+        assert out["n"].sum() == len(sample)
+
+    def test_scan_raises_on_missing_column(self, dataset_path):
+        with pt.raises(Exception):
+            ap.scan_parquet(dataset_path, estimate="missing")
@@ -0,0 +1,82 @@
+import warnings
+
+import numpy as np
+import pytest as pt
+
+import assesspy as ap
+
+
+@pt.fixture(scope="module")
+def ratios():
+    rng = np.random.default_rng(42)
+    return rng.lognormal(0, 0.3, 200_000)
+
+
+class TestQuantileSketch:
+    @pt.fixture
+    def sketch(self, ratios):
+        # Build the sketch from partitions, as it would be on separate nodes
+        sketch = ap.QuantileSketch(seed=1)
+        for i, part in enumerate(np.array_split(ratios, 13)):
+            sketch.merge(ap.QuantileSketch(seed=i).update(part))
+        return sketch
+
+    def test_sketch_is_exact_for_small_samples(self, ccao_data):
+        ratio = (ccao_data[0] / ccao_data[1])[:150]
+        sketch = ap.QuantileSketch().update(ratio)
+        assert sketch.median() == ratio.median()
+        assert sketch.cod() == pt.approx(ap.cod(*(x[:150] for x in ccao_data)))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for method in ["iqr", "quantile"]:
+                assert sketch.is_outlier(ratio, method).equals(
+                    ap.is_outlier(ratio, method)
+                )
+
+    @pt.mark.parametrize("k", [50, 200])
+    def test_sketch_rank_error_is_bounded(self, ratios, k):
+        # Documented bound for all 99 quantiles at once (union bound)
+        probs = np.linspace(0.01, 0.99, 99)
+        sketch = ap.QuantileSketch(k=k, seed=1)
+        for i, part in enumerate(np.array_split(ratios, 13)):
+            sketch.merge(ap.QuantileSketch(k=k, seed=i).update(part))
+        ranks = np.searchsorted(np.sort(ratios), sketch.quantile(probs))
+        max_error = np.abs(ranks / ratios.size - probs).max()
+        assert max_error < sketch.error_bound(delta=0.01 / probs.size)
+
+    def test_sketch_error_bound(self):
+        assert ap.QuantileSketch().error_bound() == pt.approx(0.056, abs=1e-3)
+        assert ap.QuantileSketch(k=400).error_bound() == pt.approx(0.028, 0.01)
+        with pt.raises(ValueError):
+            ap.QuantileSketch().error_bound(delta=0)
+
+    def test_sketch_memory_is_bounded(self, sketch, ratios):
+        assert sketch.n == ratios.size
+        assert sum(level.size for level in sketch._levels) < 3 * sketch.k
+
+    def test_sketch_metrics_are_close(self, sketch, ratios):
+        median_ratio = np.median(ratios)
+        cod = 100 / median_ratio * np.abs(ratios - median_ratio).mean()
+        assert sketch.median() == pt.approx(median_ratio, rel=0.01)
+        assert sketch.cod() == pt.approx(cod, rel=0.02)
+
+    def test_sketch_outlier_fences_are_close(self, sketch, ratios):
+        exact_q = np.quantile(ratios, [0.05, 0.95])
+        assert sketch.quantile_fences() == pt.approx(exact_q, rel=0.02)
+        quartiles = np.quantile(ratios, [0.25, 0.75])
+        iqr = quartiles[1] - quartiles[0]
+        exact_iqr = (quartiles[0] - 3 * iqr, quartiles[1] + 3 * iqr)
+        assert sketch.iqr_fences() == pt.approx(exact_iqr, rel=0.05)
+
+    def test_sketch_raises_on_mismatched_k(self):
+        with pt.raises(ValueError):
+            ap.QuantileSketch(k=100).merge(ap.QuantileSketch(k=200))
+
+    def test_sketch_raises_on_empty(self):
+        with pt.raises(ValueError):
+            ap.QuantileSketch().median()
+
+    @pt.mark.parametrize("bad_input", [[1.0, float("NaN")], ["1", "2"]])
+    def test_sketch_raises_on_bad_input(self, bad_input):
+        with pt.raises(Exception):
+            ap.QuantileSketch().update(bad_input)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest as pt
+
+import assesspy as ap
+from assesspy import streaming
+
+
+def make_chunks(estimate, sale_price, size):
+    estimate, sale_price = np.asarray(estimate), np.asarray(sale_price)
+    return [
+        (estimate[i : i + size], sale_price[i : i + size])
+        for i in range(0, len(estimate), size)
+    ]
+
+
+class TestStreamMetrics:
+    @pt.fixture(params=[1, 7, 100, 5000])
+    def chunk_size(self, request):
+        return request.param
+
+    @pt.fixture(params=["ccao", "quintos", "iaao"])
+    def data(self, request, ccao_data, quintos_data, iaao_data):
+        return {"ccao": ccao_data, "quintos": quintos_data, "iaao": iaao_data}[
+            request.param
+        ]
+
+    def test_stream_metrics_matches_in_memory(self, data, chunk_size):
+        result = ap.stream_metrics(make_chunks(*data, chunk_size))
+        assert result["n"] == len(data[0])
+        assert result["median_ratio"] == (data[0] / data[1]).median()
+        for metric in ["cod", "prd", "prb"]:
+            expected = getattr(ap, metric)(*data)
+            assert result[metric] == pt.approx(expected, rel=1e-10)
+
+    @pt.mark.parametrize("max_buffer", [0, 10])
+    def test_stream_metrics_radix_select_is_exact(
+        self, ccao_data, monkeypatch, max_buffer
+    ):
+        # Force extra histogram passes instead of buffering candidates
+        monkeypatch.setattr(streaming, "_MAX_BUFFER", max_buffer)
+        estimate = np.append(ccao_data[0], [1.0] * 50)
+        sale_price = np.append(ccao_data[1], [1.0] * 50)
+        result = ap.stream_metrics(make_chunks(estimate, sale_price, 64))
+        assert result["median_ratio"] == np.median(estimate / sale_price)
+        assert result["cod"] == pt.approx(ap.cod(estimate, sale_price))
+
+    def test_stream_metrics_accepts_function(self, ccao_data):
+        def chunks():
+            yield from make_chunks(*ccao_data, 250)
+
+        result = ap.stream_metrics(chunks, metrics=["prd"])
+        assert list(result) == ["n", "prd"]
+        assert result["prd"] == pt.approx(ap.prd(*ccao_data))
+
+    def test_stream_metrics_raises_on_one_shot_iterator(self, ccao_data):
+        with pt.raises(TypeError):
+            ap.stream_metrics(iter(make_chunks(*ccao_data, 250)))
+
+    def test_stream_metrics_raises_on_invalid_metric(self, ccao_data):
+        with pt.raises(ValueError):
+            ap.stream_metrics(make_chunks(*ccao_data, 250), metrics=["mki"])
+
+    def test_stream_metrics_raises_on_bad_input(self, bad_input):
+        with pt.raises(Exception):
+            ap.stream_metrics(make_chunks(*bad_input, 100))
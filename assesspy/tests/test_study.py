@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest as pt
+
+import assesspy as ap
+
+
+@pt.fixture(scope="module")
+def sample() -> pd.DataFrame:
+    sample = ap.ccao_sample()
+    rng = np.random.default_rng(42)
+    sample["class"] = rng.choice(["202", "203", "204"], size=len(sample))
+    return sample
+
+
+class TestRatioStudy:
+    @pt.fixture(params=[["township_name"], ["township_name", "class"]])
+    def by(self, request):
+        return request.param
+
+    @pt.fixture(params=["cod", "prd", "prb", "mki", "ki"])
+    def metric(self, request):
+        return request.param
+
+    def test_ratio_study_matches_groupby_apply(self, sample, by, metric):
+        result = ap.ratio_study(sample, by=by).set_index(by)[metric]
+        expected = sample.groupby(by).apply(
+            lambda x: getattr(ap, metric)(x.estimate, x.sale_price)
+        )
+        assert result.to_numpy() == pt.approx(expected.to_numpy(), rel=1e-9)
+
+    def test_ratio_study_output_structure(self, sample, by):
+        result = ap.ratio_study(sample, by=by)
+        assert isinstance(result, pd.DataFrame)
+        assert list(result.columns) == by + [
+            "n",
+            "median_ratio",
+            "cod",
+            "prd",
+            "prb",
+            "mki",
+            "ki",
+        ]
+        assert result["n"].sum() == len(sample)
+        expected = sample.groupby(by).apply(
+            lambda x: (x.estimate / x.sale_price).median()
+        )
+        assert result["median_ratio"].to_numpy() == pt.approx(
+            expected.to_numpy()
+        )
+
+    def test_ratio_study_accepts_single_column_name(self, sample):
+        result = ap.ratio_study(sample, by="township_name")
+        assert list(result["township_name"]) == ["Evanston", "New Trier"]
+
+    def test_ratio_study_single_sale_group_is_nan(self):
+        df = pd.DataFrame(
+            {
+                "estimate": [1.0, 2.0, 3.0, 4.0],
+                "sale_price": [1.0, 2.5, 2.0, 4.0],
+                "group": ["a", "a", "a", "b"],
+            }
+        )
+        result = ap.ratio_study(df, by="group").set_index("group")
+        assert result.loc["b", "cod"] == 0
+        assert np.isnan(result.loc["b", "prb"])
+
+    def test_ratio_study_raises_on_bad_input(self, bad_input):
+        estimate, sale_price = bad_input
+        if len(estimate) != len(sale_price):
+            return None
+        df = pd.DataFrame(
+            {"estimate": estimate, "sale_price": sale_price, "group": 1}
+        )
+        with pt.raises(Exception):
+            ap.ratio_study(df, by="group")
+
+
+class TestRatioStudyObject:
+    @pt.fixture(params=["cod", "prd", "prb", "mki", "ki"])
+    def metric(self, request):
+        return request.param
+
+    @pt.fixture(params=["ccao", "quintos"])
+    def data(self, request, ccao_data, quintos_data):
+        return {"ccao": ccao_data, "quintos": quintos_data}[request.param]
+
+    def test_ratio_study_object_matches_functions(self, metric, data):
+        study = ap.RatioStudy(*data)
+        result = getattr(study, metric)()
+        assert type(result) is float
+        assert result == pt.approx(getattr(ap, metric)(*data), rel=1e-9)
+
+    def test_ratio_study_object_summary(self, data):
+        study = ap.RatioStudy(*data)
+        summary = study.summary()
+        assert summary["n"] == len(data[0])
+        assert summary["median_ratio"] == (data[0] / data[1]).median()
+        for metric in ["cod", "prd", "prb", "mki", "ki"]:
+            assert summary[metric] == getattr(study, metric)()
+
+    def test_ratio_study_object_caches_intermediates(self, ccao_data):
+        study = ap.RatioStudy(*ccao_data)
+        study.summary()
+        assert study.ratio is study.ratio
+        assert "median_ratio" in study.__dict__
+        assert "_sale_price_order" in study.__dict__
+
+    def test_ratio_study_object_raises_on_bad_input(self, bad_input):
+        with pt.raises(Exception):
+            ap.RatioStudy(*bad_input)
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest as pt
+
+from assesspy.utils import check_inputs
+
+# pd.ArrowDtype was added in pandas 1.5
+requires_arrow_dtype = pt.mark.skipif(
+    not hasattr(pd, "ArrowDtype"), reason="requires pandas >= 1.5"
+)
+
+
+class TestCheckInputs:
+    @pt.mark.parametrize(
+        "x",
+        [
+            [1, 2, 3],
+            [1.0, 2.0, 3.0],
+            np.array([1, 2, 3], dtype=np.int32),
+            pd.Series([1.0, 2.0, 3.0]),
+            pd.Series([1, 2, 3], dtype="Int64"),
+        ],
+    )
+    def test_check_inputs_returns_float_arrays(self, x):
+        (result,) = check_inputs(x)
+        assert isinstance(result, np.ndarray)
+        assert result.dtype == np.float64
+        np.testing.assert_array_equal(result, [1.0, 2.0, 3.0])
+
+    @pt.mark.parametrize(
+        "x, msg",
+        [
+            (["1", "2"], "numeric"),
+            ([1.0, None], "null"),
+            (pd.Series([1, None], dtype="Int64"), "null"),
+            ([1.0], "length greater than 1"),
+            ([1.0, np.inf], "infinite"),
+            ([1.0, -1.0], "greater than 0"),
+            (np.ones((2, 2)), "one-dimensional"),
+        ],
+    )
+    def test_check_inputs_raises_with_message(self, x, msg):
+        with pt.raises(Exception, match=msg):
+            check_inputs(x)
+
+    def test_check_inputs_raises_on_different_lengths(self):
+        with pt.raises(Exception, match="same length"):
+            check_inputs([1, 2], [1, 2, 3])
+
+    def test_check_inputs_allows_non_positive_values(self):
+        (result,) = check_inputs([-1, 0, 1], check_gt_zero=False)
+        np.testing.assert_array_equal(result, [-1.0, 0.0, 1.0])
+
+    def test_check_inputs_converts_without_validation(self):
+        (result,) = check_inputs([-1, np.nan], validate=False)
+        assert result.dtype == np.float64
+        assert np.isnan(result[1])
+
+    def test_check_inputs_does_not_copy_float64(self, tmp_path):
+        base = np.linspace(1, 2, 100)
+        memmap = np.memmap(
+            tmp_path / "x.dat", dtype=np.float64, mode="w+", shape=(100,)
+        )
+        memmap[:] = base
+        memmap.flush()
+        readonly = np.memmap(tmp_path / "x.dat", dtype=np.float64, mode="r")
+        arrow = pa.array(base)
+        for x, source in [
+            (base, base),
+            (base[::2], base),
+            (memoryview(base), base),
+            (memmap, memmap),
+            (readonly, readonly),
+            (arrow, base),
+            (pa.chunked_array([arrow]), base),
+        ]:
+            (result,) = check_inputs(x)
+            assert type(result) is np.ndarray
+            assert np.shares_memory(result, source)
+
+    @requires_arrow_dtype
+    def test_check_inputs_does_not_copy_arrow_series(self):
+        base = np.linspace(1, 2, 100)
+        x = pd.Series(pa.array(base), dtype=pd.ArrowDtype(pa.float64()))
+        (result,) = check_inputs(x)
+        assert type(result) is np.ndarray
+        assert np.shares_memory(result, base)
+
+    def test_check_inputs_converts_to_float32(self):
+        base = np.linspace(1, 2, 100, dtype=np.float32)
+        (result,) = check_inputs(base, dtype="float32")
+        assert np.shares_memory(result, base)
+        (result,) = check_inputs([1, 2, 3], dtype=np.float32)
+        assert result.dtype == np.float32
+        with pt.raises(ValueError):
+            check_inputs([1, 2, 3], dtype="float16")
+
+    @pt.mark.parametrize(
+        "x",
+        [
+            pa.array([1, 2, 3]),
+            pa.chunked_array([[1.0], [2.0, 3.0]]),
+            pt.param("int64[pyarrow]", marks=requires_arrow_dtype),
+        ],
+    )
+    def test_check_inputs_converts_arrow(self, x):
+        if isinstance(x, str):
+            # Arrow-backed Series are built here, since pd.ArrowDtype is not
+            # available at collection time on older pandas
+            x = pd.Series([1, 2, 3], dtype=x)
+        (result,) = check_inputs(x)
+        assert result.dtype == np.float64
+        np.testing.assert_array_equal(result, [1.0, 2.0, 3.0])
+
+    def test_check_inputs_raises_on_arrow_nulls(self):
+        with pt.raises(Exception, match="null"):
+            check_inputs(pa.array([1.0, None, 3.0]))
@@ -3,26 +3,138 @@ import pandas as pd
 from pandas.api.types import is_numeric_dtype
 
 
-def check_inputs(*args, check_gt_zero: bool = True) -> None:
-    out_msg = [""]
-    for x in args:
-        check = pd.Series(x)
+def _check_dtype(dtype) -> np.dtype:
+    """
+    Helper function to validate the floating point type used for computation.
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError("'dtype' must be either float32 or float64.")
+
+    return dtype
+
+
+def _group_codes(by, size: int) -> tuple[np.ndarray, pd.Index]:
+    """
+    Helper function to turn group keys into an integer code per row, from 0
+    to the number of groups minus 1. ``by`` can be a list, NumPy array or
+    ``pd.Series`` of keys, or a ``pd.DataFrame`` with one column per key, and
+    is matched to the data by position. Missing keys form their own group,
+    so that every row belongs to a group. Returns the codes and the sorted
+    unique keys, as a named ``pd.Index`` or ``pd.MultiIndex``.
+    """
+    if isinstance(by, pd.DataFrame):
+        keys = by.reset_index(drop=True)
+    elif isinstance(by, pd.Series):
+        keys = by.reset_index(drop=True).to_frame(
+            "group" if by.name is None else by.name
+        )
+    else:
+        keys = pd.DataFrame({"group": np.asarray(by)})
+    if len(keys) != size:
+        raise Exception("All input values must have the same length.")
+
+    grouped = keys.groupby(
+        list(keys.columns), sort=True, observed=True, dropna=False
+    )
+
+    return grouped.ngroup().to_numpy(), grouped.size().index
+
+
+def _as_float_array(x, dtype=np.float64) -> np.ndarray:
+    """
+    Convert array-like input to a 1-D float NumPy array without validating
+    its values. Pandas nullable types are converted with ``NaN`` for missing
+    values. Object input (e.g. a list containing ``None``) falls back to
+    pandas type inference.
+
+    Input that already has the requested ``dtype`` is not copied. This
+    covers NumPy arrays (including non-contiguous views and ``np.memmap``),
+    float pandas Series, Arrow-backed Series and ``pyarrow.Array``/single
+    chunk ``ChunkedArray`` without nulls, and objects implementing the buffer
+    or ``__array__`` protocols. The returned array may then share memory with
+    (and be read-only like) the input, so it must never be modified in place.
+    """
+    if isinstance(x, (pd.Series, pd.Index)):
+        if x.dtype == dtype:
+            return x.to_numpy()
+        if is_numeric_dtype(x.dtype):
+            return x.to_numpy(dtype=dtype, na_value=np.nan)
+        return x.to_numpy()
+
+    arr = np.asarray(x)
+    if arr.dtype == object:
+        arr = pd.Series(x).to_numpy()
+    if arr.dtype.kind in "biuf":
+        arr = arr.astype(dtype, copy=False)
+
+    return arr
 
-        if not is_numeric_dtype(check):
+
+def check_inputs(
+    *args,
+    check_gt_zero: bool = True,
+    check_length: bool = True,
+    validate: bool = True,
+    dtype=np.float64,
+) -> list[np.ndarray]:
+    """
+    Validate and convert each input to a 1-D float NumPy array of type
+    ``dtype`` (float64 by default, or float32 to halve memory use).
+
+    Each input is converted once. Finiteness and positivity are then checked
+    with a single min/max reduction per input, without allocating any
+    temporary arrays. The slower, element-wise checks only run when that
+    fast path fails, in order to build the error message.
+
+    The converted arrays are returned so that callers never need to convert
+    their inputs again. If ``validate`` is ``False``, the inputs are only
+    converted. This is intended for trusted pipelines where the data has
+    already been checked. ``check_length`` can be disabled for inputs that
+    are only one chunk of a larger sample.
+    """
+    dtype = _check_dtype(dtype)
+    arrays = [_as_float_array(x, dtype) for x in args]
+    if not validate:
+        return arrays
+
+    out_msg = [""]
+    for arr in arrays:
+        if arr.dtype.kind not in "f":
             out_msg.append("All input values must be numeric.")
-        if check.isnull().any():
-            out_msg.append("All input values cannot be null.")
-        if len(check) <= 1:
+            continue
+        if arr.ndim != 1:
+            if arr.ndim > 1:
+                out_msg.append("All input values must be one-dimensional.")
+                continue
+            arr = arr.reshape(1)
+        if arr.size <= 1 and check_length:
             out_msg.append("All input values must have length greater than 1.")
-        if not all(np.isfinite(check) | check.isnull()):
+        if arr.size == 0:
+            continue
+
+        # Fast path: NaN propagates through min/max, so finite bounds mean
+        # every value is finite and non-null
+        lo, hi = arr.min(), arr.max()
+        if np.isfinite(lo) and np.isfinite(hi):
+            if lo <= 0 and check_gt_zero:
+                out_msg.append("All input values must be greater than 0.")
+            continue
+
+        is_null = np.isnan(arr)
+        if is_null.any():
+            out_msg.append("All input values cannot be null.")
+        if np.isinf(arr).any():
             out_msg.append("All input values cannot be infinite.")
-        if any(check <= 0) and check_gt_zero:
+        if check_gt_zero and (arr[~is_null] <= 0).any():
             out_msg.append("All input values must be greater than 0.")
 
-    lengths = [len(pd.Series(x)) for x in args]
+    lengths = [arr.size for arr in arrays]
     if len(set(lengths)) > 1:
         out_msg.append("All input values must have the same length.")
 
     out_msg_set = set(out_msg)
     if len(out_msg_set) > 1:
         raise Exception("\n".join(out_msg_set))
+
+    return arrays
@@ -0,0 +1,80 @@
+"""
+Compare the Bag of Little Bootstraps (BLB) to the full bootstrap.
+
+First checks agreement on ``ccao_sample``: both methods are run with several
+seeds at their default settings, and the average interval bounds and their
+spread across seeds are reported for COD and PRD. Then times both methods on a larger simulated
+sample, where BLB only resamples subsets of ``n ** gamma`` sales.
+
+Usage:
+    python benchmarks/blb.py [--seeds N] [--nboot N] [--n N]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import assesspy as ap
+
+
+def run(fun, estimate, sale_price, seeds, **kwargs) -> np.ndarray:
+    return np.array(
+        [
+            ap.boot_ci(fun, estimate, sale_price, random_state=seed, **kwargs)
+            for seed in range(seeds)
+        ]
+    )
+
+
+def timed(fun, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fun(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seeds", type=int, default=20)
+    parser.add_argument("--nboot", type=int, default=1000)
+    parser.add_argument("--n", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    sample = ap.ccao_sample()
+    print(f"ccao_sample (n = {len(sample)}), {args.seeds} seeds")
+    print(f"{'metric':<8}{'method':<8}{'lower':>16}{'upper':>16}")
+    for fun in [ap.cod, ap.prd]:
+        for method in ["full", "blb"]:
+            bounds = run(
+                fun,
+                sample.estimate,
+                sample.sale_price,
+                args.seeds,
+                nboot=args.nboot,
+                method=method,
+            )
+            mean, std = bounds.mean(axis=0), bounds.std(axis=0)
+            print(
+                f"{fun.__name__:<8}{method:<8}"
+                f"{mean[0]:>9.4f} ±{std[0]:.4f}{mean[1]:>9.4f} ±{std[1]:.4f}"
+            )
+
+    rng = np.random.default_rng(0)
+    sale_price = rng.lognormal(12.5, 0.6, args.n)
+    estimate = sale_price * rng.lognormal(0, 0.2, args.n)
+    print(f"\nsimulated sample (n = {args.n}), COD")
+    print(f"{'method':<8}{'seconds':>10}")
+    for method in ["full", "blb"]:
+        elapsed = timed(
+            ap.cod_ci,
+            estimate,
+            sale_price,
+            nboot=args.nboot,
+            method=method,
+            random_state=0,
+        )
+        print(f"{method:<8}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark the cold import time of assesspy.
+
+Each run imports assesspy in a fresh interpreter so that nothing is cached
+in ``sys.modules``. Reports the median wall time of ``import assesspy`` and
+lists any heavy optional dependencies that were loaded as a side effect.
+
+Usage:
+    python benchmarks/import_time.py [--runs N]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["pandas", "pyarrow", "scipy", "statsmodels"]
+
+SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import assesspy
+elapsed = time.perf_counter() - start
+loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+print(json.dumps({{"elapsed": elapsed, "loaded": loaded}}))
+"""
+
+
+def run_once() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    times = [r["elapsed"] * 1000 for r in results]
+    print(f"runs:            {args.runs}")
+    print(f"median (ms):     {statistics.median(times):.1f}")
+    print(f"min (ms):        {min(times):.1f}")
+    print(f"max (ms):        {max(times):.1f}")
+    print(f"heavy modules:   {results[0]['loaded'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()